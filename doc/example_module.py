@@ -98,6 +98,11 @@ class Py3status:
 
         Example 'event' json object:
         {'y': 13, 'x': 17, 'button': 1, 'name': 'example', 'instance': 'first'}
+
+        on_click is called for every event, unless the class sets
+        merge_scroll_events = True: scroll events (buttons 4 and 5) received
+        in a burst are then merged and the 'count' key of a scroll event is
+        the number of scrolls it stands for.
         """
         pass
 
@@ -1,7 +1,8 @@
 import locale
 import sys
 
-from py3status.core import Py3statusWrapper
+from py3status.cli import get_config, handle_cli_command
+from py3status.startup import StartupProfile
 
 try:
     from setproctitle import setproctitle
@@ -11,9 +12,20 @@ except ImportError:
 
 
 def main():
+    startup = StartupProfile()
+    locale.setlocale(locale.LC_ALL, '')
+    with startup.timer('config'):
+        config = get_config()
+    if config.get('cli_command'):
+        handle_cli_command(config)
+        sys.exit()
+
+    # the daemon is only imported when needed
+    with startup.timer('imports'):
+        from py3status.core import Py3statusWrapper
+
     try:
-        locale.setlocale(locale.LC_ALL, '')
-        py3 = Py3statusWrapper()
+        py3 = Py3statusWrapper(config, startup)
         py3.setup()
     except KeyboardInterrupt:
         py3.notify_user('Setup interrupted (KeyboardInterrupt).')
@@ -0,0 +1,144 @@
+from functools import partial
+from threading import Thread
+from time import time
+
+from py3status.py3 import PY3_CACHE_FOREVER
+
+
+class AsyncLoop(Thread):
+    """
+    This class runs the asyncio event loop executing the `async def` methods
+    and on_click of the modules (python 3.5+).
+
+    Async methods are scheduled on the loop using call_at() so that all
+    network bound modules share this single thread.
+    """
+
+    def __init__(self, py3_wrapper):
+        import asyncio
+        Thread.__init__(self)
+        self.daemon = True
+        self.config = py3_wrapper.config
+        # (module, method): TimerHandle of the next run
+        self.handles = {}
+        self.lock = py3_wrapper.lock
+        self.loop = asyncio.new_event_loop()
+        # (module, method) to run again once their current run is done
+        self.pending = set()
+        self.py3_wrapper = py3_wrapper
+        # (module, method): Task currently running
+        self.tasks = {}
+
+    def run(self):
+        self.loop.run_forever()
+
+    def stop(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+
+    def schedule(self, module, method, when=None):
+        """
+        Schedule the async method of the module to run at the given time
+        (now by default), this can be called from any thread.
+        """
+        self.loop.call_soon_threadsafe(self._schedule, module, method, when)
+
+    def cancel(self, module):
+        """
+        Cancel the scheduled runs of all the async methods of the module.
+        """
+        self.loop.call_soon_threadsafe(self._cancel, module)
+
+    def run_click(self, module, coroutine):
+        """
+        Run the on_click coroutine of the module.
+        """
+        self.loop.call_soon_threadsafe(self._run_click, module, coroutine)
+
+    def _schedule(self, module, method, when):
+        key = (module, method)
+        if key in self.tasks:
+            # already running, run it again once done
+            self.pending.add(key)
+            return
+        handle = self.handles.pop(key, None)
+        if handle:
+            handle.cancel()
+        delay = 0
+        if when is not None:
+            delay = max(when - time(), 0)
+        self.handles[key] = self.loop.call_at(self.loop.time() + delay,
+                                              self._run_method, module, method)
+
+    def _cancel(self, module):
+        for key in list(self.handles):
+            if key[0] is module:
+                self.handles.pop(key).cancel()
+        for key in list(self.pending):
+            if key[0] is module:
+                self.pending.discard(key)
+
+    def _run_method(self, module, method):
+        key = (module, method)
+        self.handles.pop(key, None)
+        if not self.lock.is_set() or module.sleeping:
+            return
+        try:
+            task = self.loop.create_task(module.call_method(method))
+        except Exception:
+            module.method_failed(method)
+            return
+        self.tasks[key] = task
+        task.add_done_callback(partial(self._method_done, module, method,
+                                       time()))
+        if module.execution_timeout:
+            self.loop.call_later(module.execution_timeout, self._timeout,
+                                 module, method, task)
+
+    def _timeout(self, module, method, task):
+        if not task.done():
+            module.method_timed_out(method)
+            task.cancel()
+
+    def _method_done(self, module, method, start, task):
+        key = (module, method)
+        del self.tasks[key]
+        error = True
+        if task.cancelled():
+            cached_until = None
+        else:
+            try:
+                cached_until = module.process_response(method, task.result())
+                error = False
+            except Exception:
+                module.method_failed(method)
+                cached_until = time() + self.config['cache_timeout']
+        module.methods[method]['stats'].record(time() - start, error)
+        if module.method_finished(method):
+            # the method timed out, back off before running it again
+            cached_until = module.backoff(method)
+        module.urgent = False
+
+        if key in self.pending:
+            self.pending.discard(key)
+            cached_until = time()
+        elif cached_until == PY3_CACHE_FOREVER or module.sleeping:
+            return
+        # don't be hasty mate
+        cached_until = max(cached_until,
+                           time() + self.config['minimum_interval'])
+        self._schedule(module, method, cached_until)
+
+    def _run_click(self, module, coroutine):
+        task = self.loop.create_task(coroutine)
+        task.add_done_callback(partial(self._click_done, module))
+
+    def _click_done(self, module, task):
+        try:
+            task.result()
+        except Exception:
+            msg = 'on_click event in `{}` failed'.format(
+                module.module_full_name)
+            self.py3_wrapper.report_exception(msg)
+            return
+        # update the module so the click result is shown
+        module.force_update(urgent=True)
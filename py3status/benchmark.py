@@ -0,0 +1,373 @@
+# -*- coding: utf-8 -*-
+from __future__ import print_function
+
+import os
+import sys
+
+from json import dumps
+from timeit import default_timer
+
+from py3status.helpers import print_stderr
+from py3status.output import Output, dumps_item
+
+BAR_SIZES = [10, 30, 60, 120, 240]
+
+CLICK_SIZES = [10, 50, 200]
+
+CONFIG_SIZES = [10, 100, 1000]
+
+# modules imported by the daemon and by each CLI command
+IMPORT_PATHS = [
+    ('daemon', ['py3status', 'py3status.core']),
+    ('--version', ['py3status']),
+    ('modules/docstring', ['py3status', 'py3status.docstrings']),
+    ('top', ['py3status', 'py3status.stats']),
+    ('control', ['py3status', 'py3status.control']),
+    ('benchmark', ['py3status', 'py3status.benchmark']),
+]
+
+
+def timeit(fn, number=1000):
+    '''
+    Return the best time per call of fn in microseconds.
+    '''
+    best = None
+    for _ in range(3):
+        start = default_timer()
+        for _ in range(number):
+            fn()
+        elapsed = (default_timer() - start) / number * 1e6
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def print_table(header, rows):
+    '''
+    Print the benchmark results as an aligned table.
+    '''
+    widths = [max(len(str(x)) for x in col) for col in zip(header, *rows)]
+    line = '  '.join(['{:>%s}' % w for w in widths])
+    print(line.format(*header))
+    for row in rows:
+        print(line.format(*row))
+
+
+def _bar_items(size):
+    return [{'full_text': 'module {}'.format(i),
+             'color': '#00FF00',
+             'instance': str(i),
+             'name': 'module'} for i in range(size)]
+
+
+def benchmark_output():
+    '''
+    Cost of building the status line when a single module has changed,
+    dumping the whole bar versus using the Output fragment store.
+    '''
+    rows = []
+    for size in BAR_SIZES:
+        items = _bar_items(size)
+
+        def full_rebuild():
+            items[0]['full_text'] += '.'
+            out = [dumps(x) for x in items]
+            ','.join([x for x in out if x])
+
+        output = Output(size)
+        for index, item in enumerate(items):
+            output.update(index, [item])
+        output.get_line()
+
+        def fragments():
+            items[0]['full_text'] += '.'
+            output.update(0, [items[0]])
+            output.get_line()
+
+        rows.append((size, '{:.1f}'.format(timeit(full_rebuild)),
+                     '{:.1f}'.format(timeit(fragments))))
+    print_table(('modules', 'full rebuild (us)', 'fragment store (us)'), rows)
+
+
+class _Wrapper:
+    '''
+    The parts of Py3statusWrapper needed to parse an i3status config.
+    '''
+
+    def __init__(self, config_path):
+        self.config = {'debug': False,
+                       'i3status_config_path': config_path,
+                       'standalone': True}
+        self.lock = None
+
+
+def _synthetic_config(sections):
+    '''
+    Return an i3status config of the given number of sections, half of them
+    are py3status modules and half i3status ones.
+    '''
+    lines = ['general {', '    colors = true', '    interval = 5', '}', '']
+    for i in range(sections):
+        if i % 2:
+            lines.append('order += "disk /mnt/{}"'.format(i))
+            lines.append('disk "/mnt/{}" {{'.format(i))
+            lines.append('    format = "%avail"')
+        else:
+            lines.append('order += "static_string {}"'.format(i))
+            lines.append('static_string {} {{'.format(i))
+            lines.append('    format = "module {}"'.format(i))
+            lines.append('    cache_timeout = {}'.format(i))
+            lines.append('    on_click 1 = "exec true"')
+        lines.append('}')
+        lines.append('')
+    return '\n'.join(lines)
+
+
+def benchmark_config():
+    '''
+    Time to get the i3status config, parsing it versus loading it from the
+    on disk cache.
+    '''
+    import shutil
+    from tempfile import mkdtemp
+    from py3status.config_cache import ConfigCache
+    from py3status.i3status import I3status
+
+    directory = mkdtemp()
+    # do not touch the user cache
+    xdg_cache_home = os.environ.get('XDG_CACHE_HOME')
+    os.environ['XDG_CACHE_HOME'] = directory
+    try:
+        rows = []
+        for size in CONFIG_SIZES:
+            config_path = os.path.join(directory, 'config{}'.format(size))
+            with open(config_path, 'w') as f:
+                f.write(_synthetic_config(size))
+            i3status = I3status(_Wrapper(config_path))
+
+            def parse():
+                config = i3status.i3status_config_reader(config_path)
+                i3status.get_tmp_i3status_config(config)
+
+            # the I3status constructor has cached the config
+            def cached():
+                ConfigCache(config_path).load()
+
+            rows.append((size, '{:.2f}'.format(timeit(parse, 10) / 1000),
+                         '{:.2f}'.format(timeit(cached, 10) / 1000)))
+        print_table(('sections', 'parse (ms)', 'cached (ms)'), rows)
+    finally:
+        if xdg_cache_home is None:
+            del os.environ['XDG_CACHE_HOME']
+        else:
+            os.environ['XDG_CACHE_HOME'] = xdg_cache_home
+        shutil.rmtree(directory)
+
+
+class _ClickModule:
+    '''
+    The parts of Module needed to receive click events.
+    '''
+
+    click_events = True
+
+    def __init__(self, name, instance):
+        self.methods = {'method': {'instance': instance, 'name': name}}
+        self.module_full_name = '{} {}'.format(name, instance)
+        self.module_inst = instance
+        self.module_name = name
+
+    def click_event(self, event):
+        pass
+
+    def queue_click(self, event, received_at):
+        self.click_event(event)
+
+    def force_update(self, urgent=False):
+        pass
+
+
+class _EventsWrapper:
+    '''
+    The parts of Py3statusWrapper needed to dispatch click events.
+    '''
+
+    def __init__(self, modules):
+        self.config = {'debug': False}
+        self.i3status_thread = _Wrapper(None)
+        self.i3status_thread.config = {'on_click': {}}
+        self.lock = None
+        self.modules = modules
+
+
+def _scan_click(modules, module_name, event):
+    '''
+    Dispatch the click by scanning all the modules and their methods.
+    '''
+    name, instance = module_name.split(' ')
+    for module in list(modules.values()):
+        if not module.click_events:
+            continue
+        for obj in module.methods.values():
+            if name == obj['name'] and instance == obj['instance']:
+                module.click_event(event)
+                return
+
+
+def benchmark_click():
+    '''
+    Time from a click event to the call of the on_click of the module
+    clicked (the last one of the bar), scanning all the modules versus
+    using the click index.
+    '''
+    from py3status.events import Events
+
+    rows = []
+    for size in CLICK_SIZES:
+        modules = {}
+        for i in range(size):
+            module = _ClickModule('module', str(i))
+            modules[module.module_full_name] = module
+        events = Events(_EventsWrapper(modules))
+        for module in modules.values():
+            events.add_module(module, module.module_name, module.module_inst)
+        module_name = 'module {}'.format(size - 1)
+        event = {'button': 1, 'instance': str(size - 1), 'name': 'module'}
+
+        def scan():
+            _scan_click(modules, module_name, event)
+
+        def index():
+            events.process_event(module_name, event)
+
+        rows.append((size, '{:.1f}'.format(timeit(scan)),
+                     '{:.1f}'.format(timeit(index))))
+    print_table(('modules', 'scan (us)', 'index (us)'), rows)
+
+
+def benchmark_json_list():
+    '''
+    Cost of giving the i3status output to the legacy modules for each line
+    read from i3status, copying it versus the copy on access view.
+    '''
+    from copy import deepcopy
+    from py3status.i3status import JsonList
+
+    rows = []
+    for size in BAR_SIZES:
+        items = _bar_items(size)
+
+        def copy():
+            deepcopy(items)
+
+        def view():
+            JsonList(items)
+
+        rows.append((size, '{:.1f}'.format(timeit(copy)),
+                     '{:.1f}'.format(timeit(view))))
+    print_table(('items', 'deepcopy (us)', 'view (us)'), rows)
+
+
+def benchmark_i3status():
+    '''
+    Cost of reading an i3status output line where a single item changed,
+    parsing the whole line versus comparing the JSON of its items.
+    '''
+    from json import loads
+    from py3status.i3status import split_items
+
+    rows = []
+    for size in BAR_SIZES:
+        items = _bar_items(size)
+        previous = _bar_items(size)
+        items[0]['full_text'] += '.'
+        line = '[{}]'.format(','.join([dumps_item(x) for x in items]))
+        previous_raw = [dumps_item(x) for x in previous]
+
+        def parse():
+            for item, old in zip(loads(line), previous):
+                item != old
+
+        def raw():
+            for item, old in zip(split_items(line), previous_raw):
+                if item != old:
+                    loads(item)
+
+        rows.append((size, '{:.1f}'.format(timeit(parse)),
+                     '{:.1f}'.format(timeit(raw))))
+    print_table(('items', 'parse (us)', 'raw (us)'), rows)
+
+
+def _importtime(code):
+    '''
+    Run the code in a new interpreter using `python -X importtime` and
+    return the import time of py3status in microseconds, the number of
+    modules imported and the slowest one.
+    '''
+    from subprocess import PIPE, Popen
+    process = Popen([sys.executable, '-X', 'importtime', '-c', code],
+                    stderr=PIPE)
+    stderr = process.communicate()[1].decode('utf-8')
+    total = count = 0
+    slowest = (0, '')
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        try:
+            self_time = int(fields[0])
+            cumulative = int(fields[1])
+        except ValueError:
+            # header
+            continue
+        name = fields[2].rstrip()
+        count += 1
+        slowest = max(slowest, (self_time, name.strip()))
+        # top level py3status imports include all the modules they import
+        if name.startswith(' py3status'):
+            total += cumulative
+    return total, count, slowest[1]
+
+
+def benchmark_importtime():
+    '''
+    Import time of the daemon and of each CLI command measured in a new
+    interpreter, best of 3 runs (python 3.7+).
+    '''
+    if sys.version_info < (3, 7):
+        print_stderr('Error: python -X importtime needs python 3.7+')
+        return
+    baseline = _importtime('pass')[1]
+    rows = []
+    for path, modules in IMPORT_PATHS:
+        code = 'import {}'.format(', '.join(modules))
+        total, count, slowest = min(_importtime(code) for x in range(3))
+        rows.append((path, '{:.1f}'.format(total / 1000.0), count - baseline,
+                     slowest))
+    print_table(('path', 'import time (ms)', 'modules', 'slowest module'),
+                rows)
+
+
+BENCHMARKS = {
+    'click': benchmark_click,
+    'config': benchmark_config,
+    'i3status': benchmark_i3status,
+    'importtime': benchmark_importtime,
+    'json_list': benchmark_json_list,
+    'output': benchmark_output,
+}
+
+
+def run_benchmarks(names):
+    '''
+    Run the named benchmarks, all of them if no name is given.
+    '''
+    for name in names:
+        if name not in BENCHMARKS:
+            print_stderr('Error: unknown benchmark {}, available: {}'.format(
+                name, ', '.join(sorted(BENCHMARKS))))
+            sys.exit(1)
+    for name in names or sorted(BENCHMARKS):
+        print('{}:'.format(name))
+        BENCHMARKS[name]()
+        print()
@@ -0,0 +1,182 @@
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+
+from py3status.helpers import print_stderr
+from py3status.version import version
+
+
+def get_config():
+    """
+    Create the py3status based on command line options we received.
+    """
+    # get home path
+    home_path = os.path.expanduser('~')
+
+    # defaults
+    config = {
+        'cache_timeout': 60,
+        'include_paths': ['{}/.i3/py3status/'.format(home_path)],
+        'interval': 1,
+        'minimum_interval': 0.1,  # minimum module update interval
+        'dbus_notify': False,
+    }
+
+    # package version
+    config['version'] = version
+
+    # i3status config file default detection
+    # respect i3status' file detection order wrt issue #43
+    i3status_config_file_candidates = [
+        '{}/.i3status.conf'.format(home_path),
+        '{}/.config/i3status/config'.format(os.environ.get(
+            'XDG_CONFIG_HOME', home_path)), '/etc/i3status.conf',
+        '{}/i3status/config'.format(os.environ.get('XDG_CONFIG_DIRS',
+                                                   '/etc/xdg'))
+    ]
+    for fn in i3status_config_file_candidates:
+        if os.path.isfile(fn):
+            i3status_config_file_default = fn
+            break
+    else:
+        # if none of the default files exists, we will default
+        # to ~/.i3/i3status.conf
+        i3status_config_file_default = '{}/.i3/i3status.conf'.format(
+            home_path)
+
+    # command line options
+    parser = argparse.ArgumentParser(
+        description='The agile, python-powered, i3status wrapper')
+    parser = argparse.ArgumentParser(add_help=True)
+    parser.add_argument('-c',
+                        '--config',
+                        action="store",
+                        dest="i3status_conf",
+                        type=str,
+                        default=i3status_config_file_default,
+                        help="path to i3status config file")
+    parser.add_argument('-d',
+                        '--debug',
+                        action="store_true",
+                        help="be verbose in syslog")
+    parser.add_argument('-b',
+                        '--dbus-notify',
+                        action="store_true",
+                        default=False,
+                        dest="dbus_notify",
+                        help="use notify-send to send user notifications")
+    parser.add_argument('-i',
+                        '--include',
+                        action="append",
+                        dest="include_paths",
+                        help="""include user-written modules from those
+                        directories (default ~/.i3/py3status)""")
+    parser.add_argument('-n',
+                        '--interval',
+                        action="store",
+                        dest="interval",
+                        type=float,
+                        default=config['interval'],
+                        help="update interval in seconds (default 1 sec)")
+    parser.add_argument('--profile-startup',
+                        nargs='?',
+                        const='table',
+                        choices=['table', 'json'],
+                        dest='profile_startup',
+                        help="""time the startup of py3status and its
+                        modules, print the report (as a table or json)
+                        and exit""")
+    parser.add_argument('-s',
+                        '--standalone',
+                        action="store_true",
+                        help="standalone mode, do not use i3status")
+    parser.add_argument('-t',
+                        '--timeout',
+                        action="store",
+                        dest="cache_timeout",
+                        type=int,
+                        default=config['cache_timeout'],
+                        help="""default injection cache timeout in seconds
+                        (default 60 sec)""")
+    parser.add_argument('-v',
+                        '--version',
+                        action="store_true",
+                        help="""show py3status version and exit""")
+    parser.add_argument('cli_command', nargs='*', help=argparse.SUPPRESS)
+
+    options = parser.parse_args()
+
+    if options.cli_command:
+        config['cli_command'] = options.cli_command
+
+    # only asked for version
+    if options.version:
+        from platform import python_version
+        print('py3status version {} (python {})'.format(config['version'],
+                                                        python_version()))
+        sys.exit(0)
+
+    # override configuration and helper variables
+    config['cache_timeout'] = options.cache_timeout
+    config['debug'] = options.debug
+    config['dbus_notify'] = options.dbus_notify
+    if options.include_paths:
+        config['include_paths'] = options.include_paths
+    config['interval'] = int(options.interval)
+    config['profile_startup'] = options.profile_startup
+    config['standalone'] = options.standalone
+    config['i3status_config_path'] = options.i3status_conf
+
+    # all done
+    return config
+
+
+def handle_cli_command(config):
+    """Handle a command from the CLI.
+    The modules needed by each command are only imported when used so that
+    the CLI does not pay for the daemon imports.
+    """
+    cmd = config['cli_command']
+    # aliases
+    if cmd[0] in ['mod', 'module', 'modules']:
+        cmd[0] = 'modules'
+
+    # allowed cli commands
+    if cmd[:2] in (['modules', 'list'], ['modules', 'details']):
+        import py3status.docstrings as docstrings
+        docstrings.show_modules(config, cmd[1:])
+    # docstring formatting and checking
+    elif cmd[:2] in (['docstring', 'check'], ['docstring', 'update']):
+        import py3status.docstrings as docstrings
+        if cmd[1] == 'check':
+            show_diff = len(cmd) > 2 and cmd[2] == 'diff'
+            docstrings.check_docstrings(show_diff, config)
+        if cmd[1] == 'update':
+            if len(cmd) < 3:
+                print_stderr('Error: you must specify what to update')
+                sys.exit(1)
+
+            if cmd[2] == 'modules':
+                docstrings.update_docstrings()
+            else:
+                docstrings.update_readme_for_modules(cmd[2:])
+    # live view of the running py3status modules statistics
+    elif cmd[0] == 'top':
+        from py3status.stats import top
+        top()
+    # commands sent to the running py3status through the control socket
+    elif cmd[0] == 'control':
+        from py3status.control import control_cli
+        control_cli(cmd[1:])
+    # micro benchmarks of py3status internals
+    elif cmd[0] == 'benchmark':
+        import py3status.benchmark as benchmark
+        benchmark.run_benchmarks(cmd[1:])
+    elif cmd[:2] in (['modules', 'enable'], ['modules', 'disable']):
+        # TODO: to be implemented
+        pass
+    else:
+        print_stderr('Error: unknown command')
+        sys.exit(1)
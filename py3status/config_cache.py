@@ -0,0 +1,82 @@
+import os
+import pickle
+import sys
+
+from hashlib import sha1
+from syslog import syslog, LOG_WARNING
+
+from py3status.helpers import cache_dir
+from py3status.version import version
+
+
+class ConfigCache:
+    """
+    On disk cache of the parsed i3status configuration and of the i3status
+    config generated from it, so that an unchanged config file is loaded
+    with a single read.
+
+    An entry is valid while the config file keeps the same mtime and size.
+    If they changed but the content hash did not (eg the file was touched)
+    the entry is still used.
+    """
+
+    def __init__(self, config_path):
+        self.config_path = os.path.abspath(config_path)
+        name = sha1(self.config_path.encode('utf-8')).hexdigest()
+        self.path = os.path.join(cache_dir(), 'config-{}.pickle'.format(name))
+        self.stat = None
+        # the parsed data depends on the py3status and python versions
+        self.version = (version, tuple(sys.version_info[:2]))
+
+    def get_stat(self):
+        stat = os.stat(self.config_path)
+        return (stat.st_mtime, stat.st_size)
+
+    def get_hash(self):
+        with open(self.config_path, 'rb') as f:
+            return sha1(f.read()).hexdigest()
+
+    def load(self):
+        """
+        Return the cached data of the config file or None.
+        """
+        self.stat = self.get_stat()
+        try:
+            with open(self.path, 'rb') as f:
+                entry = pickle.load(f)
+            if entry['version'] != self.version:
+                return None
+            if entry['stat'] != self.stat:
+                if entry['hash'] != self.get_hash():
+                    return None
+                entry['stat'] = self.stat
+                self.write(entry)
+            return entry['data']
+        except Exception:
+            # missing, corrupted or incompatible cache
+            return None
+
+    def save(self, data):
+        """
+        Cache the data parsed from the config file, unless the file changed
+        since load() was called.
+        """
+        if self.get_stat() != self.stat:
+            return
+        entry = {
+            'data': data,
+            'hash': self.get_hash(),
+            'stat': self.stat,
+            'version': self.version,
+        }
+        self.write(entry)
+
+    def write(self, entry):
+        tmp_path = '{}.{}.tmp'.format(self.path, os.getpid())
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(entry, f, 2)
+            os.rename(tmp_path, self.path)
+        except (IOError, OSError, pickle.PicklingError):
+            err = sys.exc_info()[1]
+            syslog(LOG_WARNING, 'writing config cache failed ({})'.format(err))
@@ -0,0 +1,235 @@
+from __future__ import print_function
+
+import os
+import socket
+import sys
+
+from json import dumps, loads
+from syslog import syslog, LOG_INFO, LOG_WARNING
+from threading import Thread
+
+from py3status.helpers import print_stderr, runtime_dir
+
+# seconds before giving up on a client or on a py3status instance
+CONTROL_TIMEOUT = 5
+
+
+class ControlServer(Thread):
+    """
+    This class listens on a per instance UNIX socket for commands sent by
+    scripts, keybindings or the py3status CLI.
+
+    The protocol is JSON lines, each request is an object with a `command`
+    key and its parameters and gets a response object:
+        {"command": "refresh", "module": "wifi"}
+        {"ok": true, "result": null}
+
+    Commands:
+        refresh: refresh the given `module`
+        refresh_all: refresh all py3status and i3status modules
+        stats: modules statistics
+        dump-output: the items currently shown in the bar
+        trigger-event: send the `event` to the given `module`
+        profile: `action` start (at the given `rate`) or stop the sampling
+            profiler, returns the path of the collapsed stacks file
+    """
+
+    def __init__(self, py3_wrapper):
+        Thread.__init__(self)
+        self.daemon = True
+        self.config = py3_wrapper.config
+        self.lock = py3_wrapper.lock
+        self.py3_wrapper = py3_wrapper
+        self.sock = None
+        self.socket_path = socket_path(os.getpid())
+
+    def listen(self):
+        """
+        Create the control socket.
+        """
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.socket_path)
+        sock.listen(5)
+        self.sock = sock
+        if self.config['debug']:
+            syslog(LOG_INFO, 'control socket listening on {}'.format(
+                self.socket_path))
+
+    def stop(self):
+        """
+        Close and remove the control socket.
+        """
+        if self.sock:
+            self.sock.close()
+        if os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+
+    def run(self):
+        while self.lock.is_set():
+            try:
+                conn = self.sock.accept()[0]
+            except socket.error:
+                break
+            try:
+                self.handle(conn)
+            except Exception:
+                err = sys.exc_info()[1]
+                syslog(LOG_WARNING, 'control connection failed ({})'.format(
+                    err))
+            finally:
+                conn.close()
+
+    def handle(self, conn):
+        """
+        Answer the requests of a connection until it is closed.
+        """
+        conn.settimeout(CONTROL_TIMEOUT)
+        for line in conn.makefile('rb'):
+            line = line.strip()
+            if not line:
+                continue
+            response = self.process(line.decode('utf-8'))
+            conn.sendall((dumps(response) + '\n').encode('utf-8'))
+
+    def process(self, line):
+        """
+        Run the command of the request line and return the response.
+        """
+        try:
+            request = loads(line)
+            command = request['command']
+            handler = getattr(self, 'command_' + command.replace('-', '_'),
+                              None)
+            if not handler:
+                raise ValueError('unknown command {}'.format(command))
+            if self.config['debug']:
+                syslog(LOG_INFO, 'control command {}'.format(request))
+            return {'ok': True, 'result': handler(request)}
+        except Exception:
+            err = sys.exc_info()[1]
+            return {'ok': False, 'error': '{}'.format(err)}
+
+    def get_module_name(self, request):
+        module_name = request.get('module')
+        if module_name not in self.py3_wrapper.output_modules:
+            raise ValueError('unknown module {}'.format(module_name))
+        return module_name
+
+    def command_refresh(self, request):
+        module_name = self.get_module_name(request)
+        self.py3_wrapper.events_thread.refresh(module_name)
+
+    def command_refresh_all(self, request):
+        self.py3_wrapper.refresh_all()
+
+    def command_stats(self, request):
+        return self.py3_wrapper.stats.dump()
+
+    def command_dump_output(self, request):
+        output = self.py3_wrapper.output
+        return output.get_items() if output else []
+
+    def command_trigger_event(self, request):
+        module_name = self.get_module_name(request)
+        event = request.get('event', {})
+        if not isinstance(event, dict):
+            raise ValueError('event should be an object')
+        self.py3_wrapper.events_thread.process_event(module_name, event)
+
+    def command_profile(self, request):
+        action = request.get('action')
+        if action == 'start':
+            return self.py3_wrapper.start_profiler(request.get('rate'))
+        elif action == 'stop':
+            return self.py3_wrapper.stop_profiler()
+        raise ValueError('unknown profile action {}'.format(action))
+
+
+def socket_path(pid):
+    """
+    Path of the control socket of the py3status instance.
+    """
+    return os.path.join(runtime_dir(), '{}.sock'.format(pid))
+
+
+def send_command(request):
+    """
+    Send the request to all the running py3status instances of the user.
+    Returns a list of (pid, response).
+    """
+    try:
+        directory = runtime_dir()
+    except OSError:
+        print_stderr('Error: {}'.format(sys.exc_info()[1]))
+        sys.exit(1)
+    responses = []
+    for f_name in sorted(os.listdir(directory)):
+        if not f_name.endswith('.sock'):
+            continue
+        pid = f_name[:-5]
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(CONTROL_TIMEOUT)
+        try:
+            sock.connect(os.path.join(directory, f_name))
+            sock.sendall((dumps(request) + '\n').encode('utf-8'))
+            response = sock.makefile('rb').readline()
+            responses.append((pid, loads(response.decode('utf-8'))))
+        except (socket.error, ValueError):
+            # dead instance
+            continue
+        finally:
+            sock.close()
+    return responses
+
+
+def control_cli(params):
+    """
+    Handle the `py3status control` CLI command.
+    """
+    usage = ('Error: usage is py3status control refresh <module> | '
+             'refresh_all | stats | dump-output | '
+             'trigger-event <module> <button> | profile start [rate] | '
+             'profile stop')
+    if not params:
+        print_stderr(usage)
+        sys.exit(1)
+    command = params[0]
+    request = {'command': command}
+    if command in ('refresh', 'trigger-event'):
+        if len(params) < 2:
+            print_stderr(usage)
+            sys.exit(1)
+        request['module'] = params[1]
+    if command == 'trigger-event':
+        name, instance = (params[1].split(' ', 1) + [''])[:2]
+        try:
+            button = int(params[2])
+        except (IndexError, ValueError):
+            print_stderr(usage)
+            sys.exit(1)
+        request['event'] = {'button': button, 'instance': instance,
+                            'name': name}
+    if command == 'profile':
+        request['action'] = params[1] if len(params) > 1 else None
+        if len(params) > 2:
+            try:
+                request['rate'] = float(params[2])
+            except ValueError:
+                print_stderr(usage)
+                sys.exit(1)
+
+    responses = send_command(request)
+    if not responses:
+        print_stderr('Error: no running py3status found')
+        sys.exit(1)
+    failed = False
+    for pid, response in responses:
+        if not response.get('ok'):
+            failed = True
+            print_stderr('py3status {}: {}'.format(pid, response.get('error')))
+        elif response.get('result') is not None:
+            print(dumps(response['result'], indent=2, sort_keys=True))
+    if failed:
+        sys.exit(1)
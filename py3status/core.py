@@ -1,169 +1,85 @@
 from __future__ import print_function
 
-import argparse
 import os
 import sys
-from collections import deque
+from collections import OrderedDict
 
 from json import dumps
 from signal import signal
-from signal import SIGTERM, SIGUSR1, SIGUSR2, SIGCONT
+from signal import SIGTERM, SIGUSR1, SIGUSR2, SIGCONT, SIGPROF
 from subprocess import Popen
-from subprocess import call
-from threading import Event
+from threading import Condition, Event, Lock, Thread
 from time import sleep, time
 from syslog import syslog, LOG_ERR, LOG_INFO, LOG_WARNING
 from traceback import extract_tb
 
-import py3status.docstrings as docstrings
+from py3status.control import ControlServer
 from py3status.events import Events
-from py3status.helpers import print_line, print_stderr
+from py3status.helpers import print_line
 from py3status.i3status import I3status
-from py3status.module import Module
-from py3status.profiling import profile
+from py3status.module import LoadingModule, Module
+from py3status.output import Output
+from py3status.profiling import SamplingProfiler
+from py3status.reader import Reader
+from py3status.scheduler import Scheduler
+from py3status.startup import StartupProfile, STARTUP_TIMEOUT
+from py3status.stats import Stats
+from py3status.watcher import Watcher
+
+try:
+    # python3
+    from queue import Empty, Queue
+except ImportError:
+    # python2
+    from Queue import Empty, Queue
 
 LOG_LEVELS = {'error': LOG_ERR, 'warning': LOG_WARNING, 'info': LOG_INFO, }
 
 DBUS_LEVELS = {'error': 'critical', 'warning': 'normal', 'info': 'low', }
 
+# default maximum refresh rate of the bar
+MAX_FPS = 10
+
 
 class Py3statusWrapper():
     """
     This is the py3status wrapper.
     """
 
-    def __init__(self):
+    def __init__(self, config, startup=None):
         """
         Useful variables we'll need.
+        config comes from the command line, see py3status.cli.get_config
         """
-        self.config = {}
+        self.async_loop = None
+        self.async_loop_lock = Lock()
+        self.config = config
+        self.control_server = None
+        # module name: time of its first output change not yet printed, in
+        # the order of the changes
+        self.dirty = OrderedDict()
+        # module name: groups containing the module
+        self.group_index = {}
         self.i3bar_running = True
         self.last_refresh_ts = time()
         self.lock = Event()
+        # module name: placeholder of the modules being loaded
+        self.loading = {}
+        self.loading_lock = Lock()
         self.modules = {}
+        self.output = None
         self.output_modules = {}
+        self.profiler = None
         self.py3_modules = []
-        self.queue = deque()
-
-    def get_config(self):
-        """
-        Create the py3status based on command line options we received.
-        """
-        # get home path
-        home_path = os.path.expanduser('~')
-
-        # defaults
-        config = {
-            'cache_timeout': 60,
-            'include_paths': ['{}/.i3/py3status/'.format(home_path)],
-            'interval': 1,
-            'minimum_interval': 0.1,  # minimum module update interval
-            'dbus_notify': False,
-        }
-
-        # package version
-        try:
-            import pkg_resources
-            version = pkg_resources.get_distribution('py3status').version
-        except:
-            version = 'unknown'
-        config['version'] = version
-
-        # i3status config file default detection
-        # respect i3status' file detection order wrt issue #43
-        i3status_config_file_candidates = [
-            '{}/.i3status.conf'.format(home_path),
-            '{}/.config/i3status/config'.format(os.environ.get(
-                'XDG_CONFIG_HOME', home_path)), '/etc/i3status.conf',
-            '{}/i3status/config'.format(os.environ.get('XDG_CONFIG_DIRS',
-                                                       '/etc/xdg'))
-        ]
-        for fn in i3status_config_file_candidates:
-            if os.path.isfile(fn):
-                i3status_config_file_default = fn
-                break
-        else:
-            # if none of the default files exists, we will default
-            # to ~/.i3/i3status.conf
-            i3status_config_file_default = '{}/.i3/i3status.conf'.format(
-                home_path)
-
-        # command line options
-        parser = argparse.ArgumentParser(
-            description='The agile, python-powered, i3status wrapper')
-        parser = argparse.ArgumentParser(add_help=True)
-        parser.add_argument('-c',
-                            '--config',
-                            action="store",
-                            dest="i3status_conf",
-                            type=str,
-                            default=i3status_config_file_default,
-                            help="path to i3status config file")
-        parser.add_argument('-d',
-                            '--debug',
-                            action="store_true",
-                            help="be verbose in syslog")
-        parser.add_argument('-b',
-                            '--dbus-notify',
-                            action="store_true",
-                            default=False,
-                            dest="dbus_notify",
-                            help="use notify-send to send user notifications")
-        parser.add_argument('-i',
-                            '--include',
-                            action="append",
-                            dest="include_paths",
-                            help="""include user-written modules from those
-                            directories (default ~/.i3/py3status)""")
-        parser.add_argument('-n',
-                            '--interval',
-                            action="store",
-                            dest="interval",
-                            type=float,
-                            default=config['interval'],
-                            help="update interval in seconds (default 1 sec)")
-        parser.add_argument('-s',
-                            '--standalone',
-                            action="store_true",
-                            help="standalone mode, do not use i3status")
-        parser.add_argument('-t',
-                            '--timeout',
-                            action="store",
-                            dest="cache_timeout",
-                            type=int,
-                            default=config['cache_timeout'],
-                            help="""default injection cache timeout in seconds
-                            (default 60 sec)""")
-        parser.add_argument('-v',
-                            '--version',
-                            action="store_true",
-                            help="""show py3status version and exit""")
-        parser.add_argument('cli_command', nargs='*', help=argparse.SUPPRESS)
-
-        options = parser.parse_args()
-
-        if options.cli_command:
-            config['cli_command'] = options.cli_command
-
-        # only asked for version
-        if options.version:
-            from platform import python_version
-            print('py3status version {} (python {})'.format(config['version'],
-                                                            python_version()))
-            sys.exit(0)
-
-        # override configuration and helper variables
-        config['cache_timeout'] = options.cache_timeout
-        config['debug'] = options.debug
-        config['dbus_notify'] = options.dbus_notify
-        if options.include_paths:
-            config['include_paths'] = options.include_paths
-        config['interval'] = int(options.interval)
-        config['standalone'] = options.standalone
-        config['i3status_config_path'] = options.i3status_conf
-
-        # all done
-        return config
+        self.reader = None
+        # the i3status config file changed and should be reloaded
+        self.reload_requested = False
+        # paths of the user modules changed, they are reloaded
+        self.reload_paths = set()
+        self.startup = startup or StartupProfile()
+        self.update_request = Condition()
+        self.urgent_update = False
+        self.watcher = None
 
     def get_user_modules(self):
         """
@@ -200,6 +116,18 @@ class Py3statusWrapper():
                     user_modules[module_name] = (include_path, f_name)
         return user_modules
 
+    def get_async_loop(self):
+        """
+        Return the asyncio loop running the async methods of the modules,
+        it is only started when first needed.
+        """
+        with self.async_loop_lock:
+            if self.async_loop is None:
+                from py3status.async_loop import AsyncLoop
+                self.async_loop = AsyncLoop(self)
+                self.async_loop.start()
+        return self.async_loop
+
     def load_modules(self, modules_list, user_modules):
         """
         Load the given modules from the list (contains instance name) with
@@ -209,25 +137,79 @@ class Py3statusWrapper():
         user_modules: {
             'weather_yahoo': ('/etc/py3status.d/', 'weather_yahoo.py')
         }
+
+        The modules are imported and instantiated concurrently by a pool of
+        threads so that a slow constructor does not delay the others, the
+        bar shows a placeholder for the modules still loading.
         """
-        for module in modules_list:
-            # ignore already provided modules (prevents double inclusion)
-            if module in self.modules:
-                continue
+        queue = Queue()
+        with self.loading_lock:
+            for module in modules_list:
+                # ignore already provided modules (prevents double inclusion)
+                if module in self.modules or module in self.loading:
+                    continue
+                self.loading[module] = LoadingModule(module)
+                queue.put(module)
+        loaders = min(queue.qsize(), len(self.scheduler.workers))
+        for x in range(loaders):
+            loader = Thread(target=self.module_loader,
+                            args=(queue, user_modules))
+            loader.daemon = True
+            loader.start()
+
+    def module_loader(self, queue, user_modules):
+        """
+        Load the modules of the queue until it is empty.
+        """
+        while self.lock.is_set():
             try:
-                my_m = Module(module, user_modules, self)
-                # only start and handle modules with available methods
-                if my_m.methods:
-                    my_m.start()
-                    self.modules[module] = my_m
-                elif self.config['debug']:
+                module = queue.get_nowait()
+            except Empty:
+                break
+            self.load_module(module, user_modules)
+
+    def load_module(self, module, user_modules):
+        """
+        Load the module and replace its placeholder in the bar.
+        """
+        my_m = None
+        try:
+            my_m = Module(module, user_modules, self)
+            # only start and handle modules with available methods
+            if not my_m.methods:
+                my_m = None
+                if self.config['debug']:
                     syslog(LOG_INFO,
                            'ignoring module "{}" (no methods found)'.format(
                                module))
-            except Exception:
-                err = sys.exc_info()[1]
-                msg = 'Loading module "{}" failed ({}).'.format(module, err)
-                self.notify_user(msg, level='warning')
+        except Exception:
+            err = sys.exc_info()[1]
+            msg = 'Loading module "{}" failed ({}).'.format(module, err)
+            self.notify_user(msg, level='warning')
+
+        with self.loading_lock:
+            self.loading.pop(module)
+            if my_m and module not in self.py3_modules:
+                # removed from the config while loading
+                my_m = None
+            if my_m:
+                self.modules[module] = my_m
+            output_module = self.output_modules.get(module)
+            if output_module and my_m:
+                output_module['module'] = my_m
+            elif output_module:
+                # modules that failed to load are not output modules, the
+                # dict is replaced as other threads may be iterating over it
+                output_modules = dict(self.output_modules)
+                del output_modules[module]
+                self.output_modules = output_modules
+        if my_m:
+            my_m.start()
+            if not self.i3bar_running:
+                my_m.sleep()
+        else:
+            # remove the placeholder from the bar
+            self.notify_update(module)
 
     def setup(self):
         """
@@ -244,19 +226,17 @@ class Py3statusWrapper():
         # SIGCONT indicates output should be resumed.
         signal(SIGCONT, self.i3bar_start)
 
-        # setup configuration
-        self.config = self.get_config()
-
-        if self.config.get('cli_command'):
-            self.handle_cli_command(self.config)
-            sys.exit()
-
         if self.config['debug']:
             syslog(LOG_INFO,
                    'py3status started with config {}'.format(self.config))
 
+        # the reader thread reads the i3status output and the i3bar events
+        self.reader = Reader(self)
+        self.reader.start()
+
         # setup i3status thread
-        self.i3status_thread = I3status(self)
+        with self.startup.timer('i3status config'):
+            self.i3status_thread = I3status(self)
 
         # If standalone or no i3status modules then use the mock i3status
         # else start i3status thread.
@@ -265,12 +245,13 @@ class Py3statusWrapper():
             self.i3status_thread.mock()
             i3s_mode = 'mocked'
         else:
-            self.i3status_thread.start()
-            while not self.i3status_thread.ready:
-                if not self.i3status_thread.is_alive():
-                    err = self.i3status_thread.error
-                    raise IOError(err)
-                sleep(0.1)
+            with self.startup.timer('i3status start'):
+                self.i3status_thread.start()
+                while not self.i3status_thread.ready:
+                    if not self.i3status_thread.is_alive():
+                        err = self.i3status_thread.error
+                        raise IOError(err)
+                    sleep(0.1)
             i3s_mode = 'started'
         if self.config['debug']:
             syslog(LOG_INFO, 'i3status thread {} with config {}'.format(
@@ -288,6 +269,28 @@ class Py3statusWrapper():
             sys.stdout = open('/dev/null', 'w')
             sys.stderr = open('/dev/null', 'w')
 
+        # setup the modules statistics and the scheduler running them
+        self.stats = Stats(self)
+        self.scheduler = Scheduler(self)
+        self.scheduler.start()
+
+        # setup the control socket used by scripts and the CLI
+        try:
+            self.control_server = ControlServer(self)
+            self.control_server.listen()
+            self.control_server.start()
+        except (IOError, OSError):
+            err = sys.exc_info()[1]
+            self.notify_user('Control socket failed ({}).'.format(err),
+                             level='warning')
+            self.control_server = None
+
+        # reload the i3status config when it changes
+        self.watcher = Watcher(self)
+        config_path = os.path.realpath(self.config['i3status_config_path'])
+        self.watcher.watch(config_path, self.config_changed)
+        self.watcher.start()
+
         # get the list of py3status configured modules
         self.py3_modules = self.i3status_thread.config['py3_modules']
 
@@ -296,10 +299,128 @@ class Py3statusWrapper():
         if self.config['debug']:
             syslog(LOG_INFO, 'user_modules={}'.format(user_modules))
 
+        # reload the user modules when their code changes
+        for include_path in self.config['include_paths']:
+            if os.path.isdir(include_path):
+                self.watcher.watch(include_path, self.user_modules_changed)
+
         if self.py3_modules:
             # load and spawn i3status.conf configured modules threads
             self.load_modules(self.py3_modules, user_modules)
 
+    def config_changed(self, paths):
+        """
+        Called by the watcher when the i3status config file changed, it is
+        reloaded by the main loop.
+        """
+        with self.update_request:
+            self.reload_requested = True
+            self.update_request.notify()
+
+    def user_modules_changed(self, paths):
+        """
+        Called by the watcher when files of the include paths changed, the
+        modules are reloaded by the main loop.
+        """
+        with self.update_request:
+            self.reload_paths.update(paths)
+            self.update_request.notify()
+
+    def reload_user_modules(self, paths):
+        """
+        Reload the modules whose file changed: the running ones are killed,
+        imported again and instantiated with the same config, the ones
+        that failed to load are given another try.  Other modules keep
+        running undisturbed.
+        """
+        names = set()
+        for path in paths:
+            f_name = os.path.basename(path)
+            if f_name.endswith('.py') and not f_name.startswith('.'):
+                names.add(f_name[:-3])
+        with self.loading_lock:
+            modules = [module for module in self.py3_modules
+                       if module.split(' ')[0] in names and
+                       module not in self.loading]
+        if not modules:
+            return
+        syslog(LOG_INFO, 'reloading modules {}'.format(modules))
+        for module in modules:
+            self.stop_module(module)
+        self.load_modules(modules, self.get_user_configured_modules())
+
+    def stop_module(self, module_name):
+        """
+        Stop the module and forget about it.
+        """
+        with self.loading_lock:
+            module = self.modules.pop(module_name, None)
+        if module:
+            module.kill()
+            self.events_thread.remove_module(module)
+            self.stats.remove(module_name)
+
+    def reload_config(self):
+        """
+        Reload the i3status config and apply its changes without restarting
+        py3status: only the modules that were added, removed or whose config
+        changed are started, stopped, reconfigured or restarted, the others
+        keep running undisturbed.  i3status is spawned again only if its own
+        config changed.
+        """
+        i3status_thread = self.i3status_thread
+        old_config = i3status_thread.config
+        try:
+            config, tmp_config = i3status_thread.load_config(
+                self.config['i3status_config_path'])
+        except Exception:
+            err = sys.exc_info()[1]
+            msg = 'Reloading the config failed ({}).'.format(err)
+            self.notify_user(msg, level='warning')
+            return
+        if config == old_config and tmp_config == i3status_thread.tmp_config:
+            return
+
+        if not i3status_thread.reload(config, tmp_config):
+            msg = 'i3status modules were added, restart py3status to use them.'
+            self.notify_user(msg, level='warning')
+        self.events_thread.update_config(config)
+        self.py3_modules = config['py3_modules']
+
+        old_modules = old_config['py3_modules']
+        removed = [name for name in old_modules
+                   if name not in self.py3_modules]
+        added = [name for name in self.py3_modules
+                 if name not in old_modules]
+        reconfigured = []
+        restarted = []
+        for name in old_modules:
+            if name in removed or old_config.get(name) == config.get(name):
+                continue
+            module = self.modules.get(name)
+            if module is None:
+                continue
+            try:
+                if module.reconfigure(old_config.get(name, {})):
+                    reconfigured.append(name)
+                    continue
+            except Exception:
+                pass
+            restarted.append(name)
+        for name in removed + restarted:
+            self.stop_module(name)
+        if added or restarted:
+            self.load_modules(added + restarted,
+                              self.get_user_configured_modules())
+
+        # the positions of the modules in the bar may have changed
+        self.create_output_modules()
+        self.output.reset(len(config['order']))
+        self.notify_update(list(self.output_modules), urgent=True)
+        syslog(LOG_INFO, 'config reloaded, modules added {} removed {} '
+               'reconfigured {} restarted {}'.format(
+                   added, removed, reconfigured, restarted))
+
     def notify_user(self, msg, level='error'):
         """
         Display notification to user via i3-nagbar or send-notify
@@ -339,29 +460,34 @@ class Py3statusWrapper():
             self.lock.clear()
             if self.config['debug']:
                 syslog(LOG_INFO, 'lock cleared, exiting')
+                if self.output:
+                    syslog(LOG_INFO, 'frames emitted={} suppressed={}'.format(
+                        self.output.frames_emitted,
+                        self.output.frames_suppressed))
+            self.reader.stop()
+            self.scheduler.stop()
+            if self.async_loop:
+                self.async_loop.stop()
             # run kill() method on all py3status modules
-            for module in self.modules.values():
+            for module in list(self.modules.values()):
                 module.kill()
+            if self.control_server:
+                self.control_server.stop()
+            if self.profiler:
+                self.stop_profiler()
             self.i3status_thread.cleanup_tmpfile()
         except:
             pass
 
     def sig_handler(self, signum, frame):
         """
-        SIGUSR1 was received, the user asks for an immediate refresh of the bar
-        so we force i3status to refresh by sending it a SIGUSR1
-        and we clear all py3status modules' cache.
+        SIGUSR1 was received, the user asks for an immediate refresh of the bar.
 
         To prevent abuse, we rate limit this function to 100ms.
         """
         if time() > (self.last_refresh_ts + 0.1):
             syslog(LOG_INFO, 'received USR1, forcing refresh')
-
-            # send SIGUSR1 to i3status
-            call(['killall', '-s', 'USR1', 'i3status'])
-
-            # clear the cache of all modules
-            self.clear_modules_cache()
+            self.refresh_all()
 
             # reset the refresh timestamp
             self.last_refresh_ts = time()
@@ -369,11 +495,61 @@ class Py3statusWrapper():
             syslog(LOG_INFO,
                    'received USR1 but rate limit is in effect, calm down')
 
+    def start_profiler(self, rate=None):
+        """
+        Start the sampling profiler, return the path of its output file.
+        """
+        if self.profiler:
+            raise ValueError('profiler already running')
+        if rate is None:
+            self.profiler = SamplingProfiler(self)
+        else:
+            self.profiler = SamplingProfiler(self, rate)
+        self.profiler.start()
+        syslog(LOG_INFO, 'profiler started, writing to {}'.format(
+            self.profiler.path))
+        return self.profiler.path
+
+    def stop_profiler(self):
+        """
+        Stop the sampling profiler and write its output file.
+        """
+        if not self.profiler:
+            raise ValueError('profiler not running')
+        profiler = self.profiler
+        self.profiler = None
+        profiler.stop()
+        syslog(LOG_INFO, 'profiler stopped, {} samples written to {}'.format(
+            profiler.sample_count, profiler.path))
+        return profiler.path
+
+    def profile_handler(self, signum, frame):
+        """
+        SIGPROF was received, start the sampling profiler or stop it if it
+        is running.
+        """
+        try:
+            if self.profiler:
+                self.stop_profiler()
+            else:
+                self.start_profiler()
+        except (IOError, OSError, ValueError):
+            err = sys.exc_info()[1]
+            syslog(LOG_WARNING, 'profiler failed ({})'.format(err))
+
+    def refresh_all(self):
+        """
+        Force i3status to refresh by sending a SIGUSR1 to our i3status process
+        and clear all py3status modules' cache.
+        """
+        self.i3status_thread.refresh_i3status()
+        self.clear_modules_cache()
+
     def clear_modules_cache(self):
         """
         For every module, reset the 'cached_until' of all its methods.
         """
-        for module in self.modules.values():
+        for module in list(self.modules.values()):
             module.force_update()
 
     def terminate(self, signum, frame):
@@ -382,25 +558,35 @@ class Py3statusWrapper():
         """
         raise KeyboardInterrupt()
 
-    def notify_update(self, update):
+    def notify_update(self, update, urgent=False):
         """
         Name or list of names of modules that have updated.
+        Urgent updates are output without waiting for the next frame.
         """
         if not isinstance(update, list):
             update = [update]
-        self.queue.extend(update)
-
-        # find groups that use the modules updated
-        module_groups = self.i3status_thread.config['.module_groups']
-        groups_to_update = set()
-        for item in update:
-            if item in module_groups:
-                groups_to_update.update(set(module_groups[item]))
-        # force groups to update
-        for group in groups_to_update:
+        # wake up the main loop so the update gets printed, a module is
+        # printed once however many times it changed meanwhile
+        now = time()
+        with self.update_request:
+            dirty = self.dirty
+            for name in update:
+                if name not in dirty:
+                    dirty[name] = now
+            if urgent:
+                self.urgent_update = True
+            self.update_request.notify()
+
+        # groups display the output of the modules they contain
+        group_index = self.group_index
+        groups = set()
+        for name in update:
+            if name in group_index:
+                groups.update(group_index[name])
+        for group in groups:
             group_module = self.output_modules.get(group)
             if group_module:
-                group_module['module'].force_update()
+                group_module['module'].force_update(urgent=urgent)
 
     def report_exception(self, msg, notify_user=True):
         """
@@ -451,6 +637,24 @@ class Py3statusWrapper():
         if notify_user:
             self.notify_user(msg, level='error')
 
+    def get_min_frame_interval(self):
+        """
+        Minimum time between two outputs of the bar, this can be set in the
+        general section using either `min_frame_interval` (in seconds) or
+        `max_fps`.
+        """
+        general = self.i3status_thread.config['general']
+        try:
+            if 'min_frame_interval' in general:
+                return max(float(general['min_frame_interval']), 0)
+            max_fps = float(general.get('max_fps', MAX_FPS))
+            return 1.0 / max_fps if max_fps > 0 else 0
+        except ValueError:
+            err = sys.exc_info()[1]
+            msg = 'Invalid max_fps/min_frame_interval setting ({}).'
+            self.notify_user(msg.format(err), level='warning')
+            return 1.0 / MAX_FPS
+
     def create_output_modules(self):
         """
         Setup our output modules to allow easy updating of py3modules and
@@ -466,12 +670,15 @@ class Py3statusWrapper():
                 positions[name] = []
             positions[name].append(index)
 
-        # py3status modules
-        for name in self.modules:
+        # py3status modules, loaded or still loading
+        with self.loading_lock:
+            py3_modules = dict(self.loading)
+            py3_modules.update(self.modules)
+        for name in py3_modules:
             if name not in output_modules:
                 output_modules[name] = {}
                 output_modules[name]['position'] = positions.get(name, [])
-                output_modules[name]['module'] = self.modules[name]
+                output_modules[name]['module'] = py3_modules[name]
                 output_modules[name]['type'] = 'py3status'
         # i3status modules
         for name in i3modules:
@@ -483,6 +690,15 @@ class Py3statusWrapper():
 
         self.output_modules = output_modules
 
+        # reverse index of the groups containing each module
+        group_index = {}
+        for name, groups in config['.module_groups'].items():
+            groups = tuple([group for group in groups
+                            if group in output_modules])
+            if groups:
+                group_index[name] = groups
+        self.group_index = group_index
+
     def i3bar_stop(self, signum, frame):
         self.i3bar_running = False
         # i3status should be stopped
@@ -490,7 +706,9 @@ class Py3statusWrapper():
         self.sleep_modules()
 
     def i3bar_start(self, signum, frame):
-        self.i3bar_running = True
+        with self.update_request:
+            self.i3bar_running = True
+            self.update_request.notify()
         self.wake_modules()
 
     def sleep_modules(self):
@@ -505,7 +723,6 @@ class Py3statusWrapper():
             if module['type'] == 'py3status':
                 module['module'].wake()
 
-    @profile
     def run(self):
         """
         Main py3status loop, continuously read from i3status and modules
@@ -515,21 +732,28 @@ class Py3statusWrapper():
         # this mimics the USR1 signal handling of i3status (see man i3status)
         signal(SIGUSR1, self.sig_handler)
         signal(SIGTERM, self.terminate)
+        # SIGPROF starts/stops the sampling profiler
+        signal(SIGPROF, self.profile_handler)
 
         # initialize usage variables
         i3status_thread = self.i3status_thread
         config = i3status_thread.config
         self.create_output_modules()
 
-        # update queue populate with all py3modules
-        self.queue.extend(self.modules)
+        # update queue populate with all py3modules, the ones still loading
+        # show their placeholder
+        self.notify_update([name for name, module
+                            in self.output_modules.items()
+                            if module['type'] == 'py3status'])
 
         # this will be our output set to the correct length for the number of
         # items in the bar
-        output = [None] * len(config['order'])
+        self.output = output = Output(len(config['order']))
 
-        interval = self.config['interval']
-        last_sec = 0
+        interval = self.config['interval'] or 1
+        next_tick = 0
+        min_frame_interval = self.get_min_frame_interval()
+        next_frame = 0
 
         # start our output
         header = {
@@ -537,19 +761,50 @@ class Py3statusWrapper():
             'click_events': True,
             'stop_signal': SIGUSR2,
         }
-        print_line(dumps(header))
-        print_line('[[]')
+        # the startup profile report replaces the bar output
+        profile_startup = self.config['profile_startup']
+        if not profile_startup:
+            print_line(dumps(header))
+            print_line('[[]')
 
         # main loop
         while True:
-            while not self.i3bar_running:
-                sleep(0.1)
+            # sleep until a module notifies an update or the next time tick
+            # is due, while i3bar is stopped we only wait to be resumed.
+            # Updates arriving during the same frame are coalesced into one
+            # output unless one of them is urgent.
+            with self.update_request:
+                while True:
+                    if not self.i3bar_running:
+                        self.update_request.wait()
+                        continue
+                    if self.reload_requested or self.reload_paths:
+                        break
+                    now = time()
+                    timeout = next_tick - now
+                    if timeout <= 0:
+                        break
+                    if self.dirty:
+                        if self.urgent_update or now >= next_frame:
+                            break
+                        timeout = min(timeout, next_frame - now)
+                    self.update_request.wait(timeout)
+
+            if self.reload_requested:
+                self.reload_requested = False
+                self.reload_config()
+                min_frame_interval = self.get_min_frame_interval()
+            if self.reload_paths:
+                with self.update_request:
+                    paths = self.reload_paths
+                    self.reload_paths = set()
+                self.reload_user_modules(paths)
 
             sec = int(time())
 
-            # only check everything is good each second
-            if sec > last_sec:
-                last_sec = sec
+            # only check everything is good on each time tick
+            if sec >= next_tick:
+                next_tick = sec - sec % interval + interval
 
                 # check i3status thread
                 if not i3status_thread.is_alive():
@@ -559,8 +814,9 @@ class Py3statusWrapper():
                     self.notify_user(err)
                     break
 
-                # check events thread
-                if not self.events_thread.is_alive():
+                # check events thread, it ends when i3bar closes stdin
+                if (not self.events_thread.is_alive() and
+                        not self.events_thread.stdin_closed):
                     # don't spam the user with i3-nagbar warnings
                     if not hasattr(self.events_thread, 'nagged'):
                         self.events_thread.nagged = True
@@ -568,56 +824,58 @@ class Py3statusWrapper():
                         self.notify_user(err, level='warning')
 
                 # update i3status time/tztime items
-                if interval == 0 or sec % interval == 0:
-                    i3status_thread.update_times()
+                i3status_thread.update_times()
+
+            # get the modules that have updated since the last output
+            with self.update_request:
+                updated = self.dirty
+                self.dirty = OrderedDict()
+                self.urgent_update = False
 
             # check if an update is needed
-            if self.queue:
-                while (len(self.queue)):
-                    module_name = self.queue.popleft()
-                    module = self.output_modules[module_name]
+            if updated:
+                for module_name in updated:
+                    module = self.output_modules.get(module_name)
+                    if (module is None and
+                            module_name in i3status_thread.i3modules):
+                        # i3status was spawned again with new modules
+                        self.create_output_modules()
+                        module = self.output_modules.get(module_name)
+                    if module is None:
+                        # module which failed to load, remove its
+                        # placeholder
+                        for index, name in enumerate(
+                                i3status_thread.config['order']):
+                            if name == module_name:
+                                output.update(index, [])
+                        continue
+                    if module['type'] == 'i3status':
+                        # the items with their JSON as output by i3status
+                        latest, fragments = (
+                            module['module'].get_latest_fragments())
+                    else:
+                        latest = module['module'].get_latest()
+                        fragments = None
                     for index in module['position']:
                         # store the output as json
                         # modules can have more than one output
-                        out = module['module'].get_latest()
-                        output[index] = ', '.join([dumps(x) for x in out])
-
-                # build output string
-                out = ','.join([x for x in output if x])
-                # dump the line to stdout
-                print_line(',[{}]'.format(out))
-
-            # sleep a bit before doing this again to avoid killing the CPU
-            sleep(0.1)
-
-    def handle_cli_command(self, config):
-        """Handle a command from the CLI.
-        """
-        cmd = config['cli_command']
-        # aliases
-        if cmd[0] in ['mod', 'module', 'modules']:
-            cmd[0] = 'modules'
-
-        # allowed cli commands
-        if cmd[:2] in (['modules', 'list'], ['modules', 'details']):
-            docstrings.show_modules(config, cmd[1:])
-        # docstring formatting and checking
-        elif cmd[:2] in (['docstring', 'check'], ['docstring', 'update']):
-            if cmd[1] == 'check':
-                show_diff = len(cmd) > 2 and cmd[2] == 'diff'
-                docstrings.check_docstrings(show_diff, config)
-            if cmd[1] == 'update':
-                if len(cmd) < 3:
-                    print_stderr('Error: you must specify what to update')
-                    sys.exit(1)
-
-                if cmd[2] == 'modules':
-                    docstrings.update_docstrings()
-                else:
-                    docstrings.update_readme_for_modules(cmd[2:])
-        elif cmd[:2] in (['modules', 'enable'], ['modules', 'disable']):
-            # TODO: to be implemented
-            pass
-        else:
-            print_stderr('Error: unknown command')
-            sys.exit(1)
+                        output.update(index, latest, fragments)
+
+                # dump the line to stdout unless nothing visible changed
+                line = output.get_frame()
+                if line is not None:
+                    if not profile_startup:
+                        print_line(',[{}]'.format(line))
+                    self.startup.set_first_frame()
+                    now = time()
+                    next_frame = now + min_frame_interval
+                    for name, changed in updated.items():
+                        self.stats.record_output(name, now - changed)
+
+            if profile_startup:
+                timed_out = time() > self.startup.start + STARTUP_TIMEOUT
+                ready = not self.loading and self.startup.check_ready(
+                    self.stats)
+                if ready or timed_out:
+                    self.startup.report(self.stats, profile_startup)
+                    break
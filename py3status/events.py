@@ -1,48 +1,17 @@
-import select
 import sys
 
 from threading import Thread
 from time import time
-from subprocess import Popen, call, PIPE
+from subprocess import Popen, PIPE
 from syslog import syslog, LOG_INFO, LOG_WARNING
 from json import loads
 
-from py3status.profiling import profile
-
-
-class IOPoller:
-    """
-    This class implements a predictive and timing-out I/O reader
-    using select and the poll() mechanism for greater compatibility.
-    """
-
-    def __init__(self, io, eventmask=select.POLLIN):
-        """
-        Our default is to read (POLLIN) the specified 'io' file descriptor.
-        """
-        self.io = io
-        self.poller = select.poll()
-        self.poller.register(io, eventmask)
-
-    def readline(self, timeout=500):
-        """
-        Try to read our I/O for 'timeout' milliseconds, return None otherwise.
-        This makes calling and reading I/O non blocking !
-        """
-        poll_result = self.poller.poll(timeout)
-        if poll_result:
-            line = self.io.readline().strip()
-            if self.io == sys.stdin and line == '[':
-                # skip first event line wrt issue #19
-                line = self.io.readline().strip()
-            try:
-                # python3 compatibility code
-                line = line.decode()
-            except (AttributeError, UnicodeDecodeError):
-                pass
-            return line
-        else:
-            return None
+try:
+    # python3
+    from queue import Queue
+except ImportError:
+    # python2
+    from Queue import Queue
 
 
 class Events(Thread):
@@ -52,37 +21,96 @@ class Events(Thread):
 
     def __init__(self, py3_wrapper):
         """
-        We need to poll stdin to receive i3bar messages.
+        The i3bar messages are read from stdin by the reader thread and
+        queued to us.
         """
         Thread.__init__(self)
+        # (name, instance): module, the modules receiving the clicks
+        self.click_index = {}
+        # name: module, for the clicks without instance
+        self.click_names = {}
         self.config = py3_wrapper.config
         self.i3s_config = py3_wrapper.i3status_thread.config
         self.last_refresh_ts = time()
         self.lock = py3_wrapper.lock
         self.modules = py3_wrapper.modules
         self.on_click = self.i3s_config['on_click']
-        self.poller_inp = IOPoller(sys.stdin)
         self.py3_wrapper = py3_wrapper
+        # batches of (lines, received_at), None once stdin is closed
+        self.queue = Queue()
+        # stdin was closed by i3bar
+        self.stdin_closed = False
 
-    def dispatch(self, module, obj, event):
+    def add_lines(self, lines):
         """
-        Dispatch the event or enforce the default clear cache action.
+        Called by the reader thread with the lines read from stdin.
+        """
+        if lines is None:
+            self.queue.put(None)
+        else:
+            self.queue.put((lines, time()))
+
+    def update_config(self, i3s_config):
+        """
+        Use the reloaded i3status config.
+        """
+        self.i3s_config = i3s_config
+        self.on_click = i3s_config['on_click']
+
+    def add_module(self, module, name, instance):
+        """
+        Index the module receiving the clicks on the output of the given
+        name and instance, modules call it once their methods reported them.
+        """
+        self.click_index[(name, instance)] = module
+        self.click_names.setdefault(name, module)
+
+    def remove_module(self, module):
+        """
+        Remove the module from the click index, eg when it is stopped.
+        """
+        for index in (self.click_index, self.click_names):
+            for key, value in list(index.items()):
+                if value is module:
+                    del index[key]
+
+    def get_module(self, name, instance):
+        """
+        Return the running module receiving the clicks on the output of the
+        given name and instance.
+        """
+        if instance:
+            module = self.click_index.get((name, instance))
+        else:
+            module = (self.click_index.get((name, '')) or
+                      self.click_names.get(name))
+        # ignore modules stopped or replaced since they were indexed
+        if module and self.modules.get(module.module_full_name) is module:
+            return module
+        return None
+
+    def dispatch(self, module, event, received_at):
+        """
+        Queue the event to the module or enforce the default clear cache
+        action.  The clicks are run by the scheduler workers so that a slow
+        on_click does not hold the events thread.
         """
-        module_name = '{} {}'.format(module.module_name,
-                                     module.module_inst).strip()
-        #
         if module.click_events:
-            # module accepts click_events, use it
-            module.click_event(event)
+            # module accepts click_events, queue it, the module is refreshed
+            # once its on_click has run
+            module.queue_click(event, received_at)
             if self.config['debug']:
                 syslog(LOG_INFO, 'dispatching event {}'.format(event))
-        else:
-            # default button 2 action is to clear this method's cache
-            if self.config['debug']:
-                syslog(LOG_INFO, 'dispatching default event {}'.format(event))
+            return
+
+        # default button 2 action is to clear this method's cache
+        if self.config['debug']:
+            syslog(LOG_INFO, 'dispatching default event {}'.format(event))
 
         # to make the bar more responsive to users we ask for a refresh
         # of the module or of i3status if the module is an i3status one
+        module_name = '{} {}'.format(module.module_name,
+                                     module.module_inst).strip()
         self.refresh(module_name)
 
     def i3bar_click_events_module(self):
@@ -93,17 +121,15 @@ class Events(Thread):
         it will dispatch i3status click events to this module so you can catch
         them and trigger any function call based on the event.
         """
-        for module in self.modules.values():
-            if not module.click_events:
-                continue
-            if module.module_name == 'i3bar_click_events.py':
-                return module
-        else:
-            return False
+        module = self.modules.get('i3bar_click_events')
+        if module and module.click_events:
+            return module
+        return False
 
     def refresh(self, module_name):
         """
         Force a cache expiration for all the methods of the given module.
+        The update is urgent as the user is waiting for the bar to react.
 
         We rate limit the i3status refresh to 100ms.
         """
@@ -111,25 +137,24 @@ class Events(Thread):
         if module is not None:
             if self.config['debug']:
                 syslog(LOG_INFO, 'refresh module {}'.format(module_name))
-            module.force_update()
+            module.force_update(urgent=True)
         else:
             if time() > (self.last_refresh_ts + 0.1):
                 if self.config['debug']:
                     syslog(
                         LOG_INFO,
                         'refresh i3status for module {}'.format(module_name))
-                call(['killall', '-s', 'USR1', 'i3status'])
+                self.py3_wrapper.i3status_thread.refresh_i3status()
                 self.last_refresh_ts = time()
 
     def refresh_all(self, module_name):
         """
-        Force a full refresh of py3status and i3status modules by sending
-        a SIGUSR1 signal to py3status.
+        Force a full refresh of py3status and i3status modules.
 
         We rate limit this command to 100ms for obvious abusive behavior.
         """
         if time() > (self.last_refresh_ts + 0.1):
-            call(['killall', '-s', 'USR1', 'py3status'])
+            self.py3_wrapper.refresh_all()
             self.last_refresh_ts = time()
 
     def on_click_dispatcher(self, module_name, command):
@@ -162,46 +187,36 @@ class Events(Thread):
         syslog(LOG_INFO, 'i3-msg module="{}" command="{}" stdout={}'.format(
             module_name, command, i3_msg_pipe.stdout.read()))
 
-    def process_event(self, module_name, event):
+    def process_event(self, module_name, event, received_at=None):
         """
         Process the event for the named module.
         Events may have been declared in i3status.conf, modules may have
         on_click() functions. There is a default middle click event etc.
+        received_at is the time the event was read, now by default.
         """
+        if received_at is None:
+            received_at = time()
         button = event.get('button', 0)
         default_event = False
         dispatched = False
         # execute any configured i3-msg command
         if self.on_click.get(module_name, {}).get(button):
-            self.on_click_dispatcher(module_name,
-                                     self.on_click[module_name].get(button))
+            # the event can stand for several scrolls merged by a group
+            for x in range(event.get('count', 1)):
+                self.on_click_dispatcher(
+                    module_name, self.on_click[module_name].get(button))
             dispatched = True
         # otherwise setup default action on button 2 press
         elif button == 2:
             default_event = True
 
-        for module in self.modules.values():
-            # skip modules not supporting click_events
-            # unless we have a default_event set
-            if not module.click_events and not default_event:
-                continue
-
-            # check for the method name/instance
-            if ' ' in module_name:
-                name, instance = module_name.split(' ')
-            else:
-                name, instance = module_name, None
-            for obj in module.methods.values():
-                if name == obj['name']:
-                    if instance:
-                        if instance == obj['instance']:
-                            self.dispatch(module, obj, event)
-                            dispatched = True
-                            break
-                    else:
-                        self.dispatch(module, obj, event)
-                        dispatched = True
-                        break
+        name, _, instance = module_name.partition(' ')
+        module = self.get_module(name, instance)
+        # skip modules not supporting click_events
+        # unless we have a default_event set
+        if module and (module.click_events or default_event):
+            self.dispatch(module, event, received_at)
+            dispatched = True
 
         # fall back to i3bar_click_events.py module if present
         if not dispatched:
@@ -209,13 +224,42 @@ class Events(Thread):
             if module:
                 if self.config['debug']:
                     syslog(LOG_INFO, 'dispatching event to i3bar_click_events')
-                self.dispatch(module, obj, event)
+                self.dispatch(module, event, received_at)
+
+    def process_line(self, event_str, received_at):
+        """
+        Decode the i3bar JSON event and process it.
+        """
+        # skip the opening of the events array wrt issue #19
+        if event_str == '[':
+            return
+        # remove leading comma if present
+        if event_str[0] == ',':
+            event_str = event_str[1:]
+        event = loads(event_str)
+
+        if self.config['debug']:
+            syslog(LOG_INFO, 'received event {}'.format(event))
+
+        # usage variables
+        instance = event.get('instance', '')
+        name = event.get('name', '')
+
+        if self.config['debug']:
+            syslog(
+                LOG_INFO,
+                'trying to dispatch event to module "{}"'.format(
+                    '{} {}'.format(name, instance).strip()))
+
+        # guess the module config name
+        module_name = '{} {}'.format(name, instance).strip()
+        # do the work
+        self.process_event(module_name, event, received_at)
 
-    @profile
     def run(self):
         """
-        Wait for an i3bar JSON event, then find the right module to dispatch
-        the message to based on the 'name' and 'instance' of the event.
+        Wait for i3bar JSON events, then find the right module to dispatch
+        each message to based on the 'name' and 'instance' of the event.
 
         In case the module does NOT support click_events, the default
         implementation is to clear the module's cache
@@ -224,34 +268,18 @@ class Events(Thread):
         Example event:
         {'y': 13, 'x': 1737, 'button': 1, 'name': 'empty', 'instance': 'first'}
         """
+        self.py3_wrapper.reader.add(sys.stdin, self.add_lines)
         while self.lock.is_set():
-            event_str = self.poller_inp.readline()
-            if not event_str:
-                continue
-            try:
-                # remove leading comma if present
-                if event_str[0] == ',':
-                    event_str = event_str[1:]
-                event = loads(event_str)
-
-                if self.config['debug']:
-                    syslog(LOG_INFO, 'received event {}'.format(event))
-
-                # usage variables
-                instance = event.get('instance', '')
-                name = event.get('name', '')
-
-                if self.config['debug']:
-                    syslog(
-                        LOG_INFO,
-                        'trying to dispatch event to module "{}"'.format(
-                            '{} {}'.format(name, instance).strip()))
-
-                # guess the module config name
-                module_name = '{} {}'.format(name, instance).strip()
-                # do the work
-                self.process_event(module_name, event)
-
-            except Exception:
-                err = sys.exc_info()[1]
-                syslog(LOG_WARNING, 'event failed ({})'.format(err))
+            batch = self.queue.get()
+            if batch is None:
+                break
+            lines, received_at = batch
+            for event_str in lines:
+                try:
+                    self.process_line(event_str, received_at)
+                except Exception:
+                    err = sys.exc_info()[1]
+                    syslog(LOG_WARNING, 'event failed ({})'.format(err))
+        if self.lock.is_set():
+            self.stdin_closed = True
+            syslog(LOG_INFO, 'stdin closed, click events are disabled')
@@ -1,7 +1,10 @@
 from __future__ import print_function
 
+import os
 import sys
 
+from stat import S_IMODE, S_ISDIR
+
 
 def print_line(line):
     """
@@ -15,3 +18,50 @@ def print_stderr(line):
     """Print line to stderr
     """
     print(line, file=sys.stderr)
+
+
+def runtime_dir():
+    """
+    Return the directory holding the runtime files of py3status instances
+    (control sockets, profiles), it is created if needed.
+    Raises OSError if the directory in the shared temporary directory is
+    not a private directory of the user, it could have been created by
+    another user to intercept the control sockets.
+    """
+    base_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if base_dir:
+        path = os.path.join(base_dir, 'py3status')
+    else:
+        from tempfile import gettempdir
+        path = os.path.join(gettempdir(), 'py3status-{}'.format(os.getuid()))
+    if not os.path.isdir(path):
+        try:
+            os.makedirs(path, 0o700)
+        except OSError:
+            # created by another instance meanwhile
+            pass
+    if not base_dir:
+        stat = os.lstat(path)
+        if (not S_ISDIR(stat.st_mode) or stat.st_uid != os.getuid() or
+                S_IMODE(stat.st_mode) != 0o700):
+            raise OSError('{} is not a private directory of the user'.format(
+                path))
+    return path
+
+
+def cache_dir():
+    """
+    Return the directory holding the cache files of py3status, it is
+    created if needed.
+    """
+    base_dir = os.environ.get('XDG_CACHE_HOME')
+    if not base_dir:
+        base_dir = os.path.join(os.path.expanduser('~'), '.cache')
+    path = os.path.join(base_dir, 'py3status')
+    if not os.path.isdir(path):
+        try:
+            os.makedirs(path, 0o700)
+        except OSError:
+            # created by another instance meanwhile
+            pass
+    return path
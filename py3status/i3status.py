@@ -1,24 +1,35 @@
-import sys
 import os
+import re
 
 from copy import deepcopy
 from json import loads
 from datetime import datetime, timedelta, tzinfo
+from functools import partial
 from subprocess import Popen
 from subprocess import PIPE
 from syslog import syslog, LOG_INFO
-from signal import SIGUSR2, SIGSTOP, SIG_IGN, signal
+from signal import SIGUSR1, SIGUSR2, SIGSTOP, SIG_IGN, signal
 from tempfile import NamedTemporaryFile
-from threading import Thread
+from threading import Event, Thread
 from time import time
 
-from py3status.profiling import profile
-from py3status.events import IOPoller
+from py3status.config_cache import ConfigCache
+from py3status.output import dumps_item
+from py3status.parse_config import (Assignment, Order, ParseError, Section,
+                                    parse_config)
 
 TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
 TZTIME_FORMAT = '%Y-%m-%d %H:%M:%S %Z'
 TIME_MODULES = ['time', 'tztime']
 
+# one item of the i3status output, items have no nested objects
+I3STATUS_ITEM = re.compile(
+    r'\{[^{}"]*(?:"[^"\\]*(?:\\.[^"\\]*)*"[^{}"]*)*\}')
+
+# general section parameters used by py3status only, i3status does not know
+# about them so they are not written to its configuration
+PY3STATUS_GENERAL_PARAMS = ['max_fps', 'min_frame_interval', 'workers']
+
 
 class Tz(tzinfo):
     """
@@ -41,6 +52,100 @@ class Tz(tzinfo):
         return timedelta(0)
 
 
+def split_items(line):
+    """
+    Split an i3status output line into the JSON of its items, return None
+    if the line is not a flat array of objects.
+    """
+    body = line[2:-2]
+    separators = body.count('},{')
+    # no brace but the separators of the items, a plain split is enough
+    # unless a separator is in a string: without escaped characters every
+    # item then has an even number of quotes
+    if (body.count('{') == separators and body.count('}') == separators and
+            line[:2] == '[{' and line[-2:] == '}]' and '\\' not in body):
+        items = body.split('},{')
+        if all(item.count('"') % 2 == 0 for item in items):
+            return ['{' + item + '}' for item in items]
+    items = I3STATUS_ITEM.findall(line)
+    # the items, their separators and the brackets must be the whole line
+    if (not items or line[0] != '[' or
+            len(line) != sum(map(len, items)) + len(items) + 1):
+        return None
+    return items
+
+
+class JsonList:
+    """
+    Read only view of the last i3status output given to the legacy modules
+    as i3s_output_list.  An item is copied on its first access so that the
+    modules can modify it without altering the i3status output, the items
+    never accessed are not copied.
+    Any other list operation works on a copy of the whole list.
+    It is not a list instance (isinstance(i3s_output_list, list) is False)
+    but compares equal to a list of the same items.
+    """
+
+    # mutable like a list
+    __hash__ = None
+
+    def __init__(self, items):
+        # index: copy of the item
+        self.copies = {}
+        self.items = items
+        # full copy of the list once a list method was used
+        self.list = None
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __eq__(self, other):
+        if isinstance(other, JsonList):
+            other = list(other)
+        return list(self) == other
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __len__(self):
+        if self.list is not None:
+            return len(self.list)
+        return len(self.items)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __getitem__(self, index):
+        if self.list is not None:
+            return self.list[index]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self.items)))]
+        if index < 0:
+            index += len(self.items)
+        item = self.copies.get(index)
+        if item is None:
+            # setdefault: threads reading the same item get the same copy
+            item = self.copies.setdefault(index, deepcopy(self.items[index]))
+        return item
+
+    def __setitem__(self, index, value):
+        self.get_list()[index] = value
+
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return getattr(self.get_list(), name)
+
+    def get_list(self):
+        """
+        Return the copy of the whole list.
+        """
+        if self.list is None:
+            self.list = [self[i] for i in range(len(self.items))]
+        return self.list
+
+
 class I3statusModule:
     """
     This a wrapper for i3status items so that they mirror some of the methods
@@ -63,6 +168,12 @@ class I3statusModule:
         self.instance = instance
 
         self.item = {}
+        # (item, fragment) published to the main loop as a single attribute
+        # so that it never gets an item with the fragment of another one,
+        # the fragment is the JSON of the item as output by i3status and as
+        # output on the bar when it is not modified by py3status
+        self.latest = (self.item, None)
+        self.raw = None
 
         self.i3status = py3_wrapper.i3status_thread
         self.py3_wrapper = py3_wrapper
@@ -76,7 +187,35 @@ class I3statusModule:
         return '<I3statusModule {}>'.format(self.module_name)
 
     def get_latest(self):
-        return [self.item]
+        return [self.latest[0]]
+
+    def get_latest_fragments(self):
+        """
+        Return the items and their JSON fragments (None if unknown).
+        """
+        item, fragment = self.latest
+        return [item], [fragment]
+
+    def update_from_raw(self, raw, item):
+        """
+        Update from the JSON of the i3status item and its parsed value.
+        returns if item has changed.
+        """
+        name = item.get('name')
+        instance = item.get('instance')
+        # the JSON of the item is output as is unless we modified it
+        if self.is_time_module or name != self.name:
+            fragment = None
+        elif instance == self.instance:
+            fragment = raw
+        elif instance is None and not self.instance:
+            fragment = raw[:-1] + ',"instance":""}'
+        else:
+            fragment = None
+        is_updated = self.update_from_item(item)
+        self.raw = raw
+        self.latest = (self.item, fragment)
+        return is_updated
 
     def update_from_item(self, item):
         """
@@ -161,19 +300,67 @@ class I3status(Thread):
             'tztime', 'volume', 'wireless'
         ]
         self.i3modules = {}
+        self.i3status_pipe = None
         self.json_list = None
         self.json_list_ts = None
+        # last line written by i3status on stderr
+        self.last_error = None
         self.last_output = None
         self.lock = py3_wrapper.lock
         self.new_update = False
         self.py3_wrapper = py3_wrapper
         self.ready = False
+        # i3status is stopped to be spawned again with a new config
+        self.restart = False
         self.standalone = py3_wrapper.config['standalone']
         self.time_modules = []
         self.tmpfile_path = None
         #
         config_path = py3_wrapper.config['i3status_config_path']
-        self.config = self.i3status_config_reader(config_path)
+        self.config, self.tmp_config = self.load_config(config_path)
+
+    def load_config(self, config_path):
+        """
+        Return the parsed i3status config and the i3status config generated
+        from it, from the cache if the config file did not change.
+        """
+        cache = ConfigCache(config_path)
+        cached = cache.load()
+        if cached:
+            if self.py3_wrapper.config['debug']:
+                syslog(LOG_INFO, 'i3status config loaded from cache {}'.format(
+                    cache.path))
+            return cached
+        config = self.i3status_config_reader(config_path)
+        tmp_config = self.get_tmp_i3status_config(config)
+        cache.save((config, tmp_config))
+        return config, tmp_config
+
+    def reload(self, config, tmp_config):
+        """
+        Use the reloaded i3status config, i3status is spawned again if its
+        own config changed.  Return False if i3status is not running and
+        should be started for this config.
+        """
+        if tmp_config == self.tmp_config:
+            self.config = config
+            # the time format is not part of the i3status config
+            for module in list(self.i3modules.values()):
+                if module.is_time_module:
+                    module.set_time_format()
+            return True
+        running = self.i3status_pipe is not None
+        if running:
+            # ignore the output of the old i3status from now on
+            self.restart = True
+        self.config = config
+        self.tmp_config = tmp_config
+        self.i3modules = {}
+        if running:
+            syslog(LOG_INFO, 'i3status config changed, spawning i3status')
+            self.i3status_pipe.terminate()
+            return True
+        return self.standalone or not config['i3s_modules']
 
     def update_times(self):
         """
@@ -192,66 +379,13 @@ class I3status(Thread):
         """
         Check if a given section name is a valid parameter for i3status.
         """
+        name = param_name.split(' ')[0]
         if cleanup:
-            valid_config_params = [
-                _
-                for _ in self.i3status_module_names
-                if _ not in ['cpu_usage', 'ddate', 'ipv6', 'load', 'time']
-            ]
-        else:
-            valid_config_params = self.i3status_module_names + [
-                'general', 'order'
-            ]
-        return param_name.split(' ')[0] in valid_config_params
-
-    @staticmethod
-    def eval_config_parameter(param):
-        """
-        Try to evaluate the given parameter as a string or integer and return
-        it properly. This is used to parse i3status configuration parameters
-        such as 'disk "/home" {}' or worse like '"cpu_temperature" 0 {}'.
-        """
-        params = param.split(' ')
-        result_list = list()
-
-        for p in params:
-            try:
-                e_value = eval(p)
-                if isinstance(e_value, str) or isinstance(e_value, int):
-                    p = str(e_value)
-                else:
-                    raise ValueError()
-            except (NameError, SyntaxError, ValueError):
-                pass
-            finally:
-                result_list.append(p)
-
-        return ' '.join(result_list)
-
-    @staticmethod
-    def eval_config_value(value):
-        """
-        Try to evaluate the given parameter as a string or integer and return
-        it properly. This is used to parse i3status configuration parameters
-        such as 'disk "/home" {}' or worse like '"cpu_temperature" 0 {}'.
-        """
-        if value.lower() in ('true', 'false'):
-            return eval(value.title())
-        try:
-            e_value = eval(value)
-            if isinstance(e_value, str):
-                if e_value.lower() in ('true', 'false'):
-                    value = eval(e_value.title())
-                else:
-                    value = e_value
-            elif isinstance(e_value, int):
-                value = e_value
-            else:
-                raise ValueError()
-        except (NameError, ValueError):
-            pass
-        finally:
-            return value
+            return (name in self.i3status_module_names and
+                    name not in ('cpu_usage', 'ddate', 'ipv6', 'load', 'time'))
+        if name in ('general', 'order'):
+            return True
+        return name in self.i3status_module_names
 
     def i3status_config_reader(self, i3status_config_path):
         """
@@ -275,147 +409,20 @@ class I3status(Thread):
             'py3_modules': []
         }
 
-        # some ugly parsing
-        in_section = False
-        section_name = ''
-        group_name = None
-
-        for line in open(i3status_config_path, 'r'):
-            line = line.strip(' \t\n\r')
-
-            if not line or line.startswith('#'):
-                continue
-
-            if line.startswith('order'):
-                in_section = True
-                section_name = 'order'
-
-            if not in_section and line.startswith('group'):
-                group_name = line.split('{')[0].strip()
-                config[group_name] = {'items': []}
-                continue
-
-            if not in_section and group_name and line == '}':
-                group_name = None
-                continue
-
-            if group_name and not in_section and '=' in line:
-                # check this is not a section definition
-                if '{' not in line or line.index('{') > line.index('='):
-                    key = line.split('=', 1)[0].strip()
-                    key = self.eval_config_parameter(key)
-                    value = line.split('=', 1)[1].strip()
-                    value = self.eval_config_value(value)
-                    if not key.startswith('on_click'):
-                        config[group_name][key] = value
-                    else:
-                        # on_click special parameters
-                        try:
-                            button = int(key.split()[1])
-                            if button not in range(1, 6):
-                                raise ValueError('should be 1, 2, 3, 4 or 5')
-                        except IndexError as e:
-                            raise IndexError(
-                                'missing "button id" for "on_click" '
-                                'parameter in group {}'.format(group_name))
-                        except ValueError as e:
-                            raise ValueError('invalid "button id" '
-                                             'for "on_click" parameter '
-                                             'in group {} ({})'.format(
-                                                 group_name, e))
-                        on_c = config['on_click']
-                        on_c[group_name] = on_c.get(group_name, {})
-                        on_c[group_name][button] = value
-                    continue
-
-            if not in_section:
-                section_name = line.split('{')[0].strip()
-                section_name = self.eval_config_parameter(section_name)
-                if not section_name:
-                    continue
-                else:
-                    in_section = True
-                    if section_name not in config:
-                        config[section_name] = {}
-                    if group_name:
-                        # update the items in the group
-                        config[group_name]['items'].append(section_name)
-                        section = config['.module_groups'].setdefault(section_name, [])
-                        if group_name not in section:
-                            section.append(group_name)
-                        if not self.valid_config_param(section_name):
-                            # py3status module add a reference to the group and
-                            # make sure we have it in the list of modules to
-                            # run
-                            if section_name not in config['py3_modules']:
-                                config['py3_modules'].append(section_name)
-                        else:
-                            # i3status module.  Add to the list of needed
-                            # modules and add to the `.group-extras` config to
-                            # ensure that it gets run even though not in
-                            # `order` config
-                            if section_name not in config['i3s_modules']:
-                                config['i3s_modules'].append(section_name)
-                            if section_name not in config['.group_extras']:
-                                config['.group_extras'].append(section_name)
-
-            if '{' in line:
-                in_section = True
-
-            if section_name and '=' in line:
-                section_line = line
-
-                # one liner cases
-                if line.endswith('}'):
-                    section_line = section_line.split('}', -1)[0].strip()
-                if line.startswith(section_name + ' {'):
-                    section_line = section_line.split(section_name + ' {')[
-                        1].strip()
-
-                key = section_line.split('=', 1)[0].strip()
-                key = self.eval_config_parameter(key)
-
-                value = section_line.split('=', 1)[1].strip()
-                value = self.eval_config_value(value)
-
-                if section_name == 'order':
-                    config[section_name].append(value)
-                    line = '}'
-
-                    # create an empty config for this module
-                    if value not in config:
-                        config[value] = {}
-
-                    # detect internal modules to be loaded dynamically
-                    if not self.valid_config_param(value):
-                        config['py3_modules'].append(value)
-                    else:
-                        config['i3s_modules'].append(value)
+        with open(i3status_config_path, 'r') as f:
+            text = f.read()
+        try:
+            for node in parse_config(text):
+                if isinstance(node, Order):
+                    self.add_order(config, node.value)
+                elif node.name.split(' ')[0] == 'group':
+                    self.add_group(config, node)
                 else:
-                    if not key.startswith('on_click'):
-                        config[section_name][key] = value
-                    else:
-                        # on_click special parameters
-                        try:
-                            button = int(key.split()[1])
-                            if button not in range(1, 6):
-                                raise ValueError('should be 1, 2, 3, 4 or 5')
-                        except IndexError as e:
-                            raise IndexError(
-                                'missing "button id" for "on_click" '
-                                'parameter in section {}'.format(section_name))
-                        except ValueError as e:
-                            raise ValueError('invalid "button id" '
-                                             'for "on_click" parameter '
-                                             'in section {} ({})'.format(
-                                                 section_name, e))
-                        on_c = config['on_click']
-                        on_c[section_name] = on_c.get(section_name, {})
-                        on_c[section_name][button] = value
-
-            if line.endswith('}'):
-                in_section = False
-                section_name = ''
+                    config.setdefault(node.name, {})
+                    self.add_section_params(config, node)
+        except ParseError as e:
+            raise RuntimeError('invalid config {}, {}'.format(
+                i3status_config_path, e))
 
         # py3status only uses the i3bar protocol because it needs JSON output
         if config['general']['output_format'] != 'i3bar':
@@ -429,19 +436,18 @@ class I3status(Thread):
 
         # time and tztime modules need a format for correct processing
         for name in config:
-            if name.split()[0] in TIME_MODULES and 'format' not in config[
-                    name]:
-                if name.split()[0] == 'time':
+            module_type = name.split(' ')[0]
+            if module_type in TIME_MODULES and 'format' not in config[name]:
+                if module_type == 'time':
                     config[name]['format'] = TIME_FORMAT
                 else:
                     config[name]['format'] = TZTIME_FORMAT
 
         def clean_i3status_modules(key):
             # cleanup unconfigured i3status modules that have no default
-            for module_name in deepcopy(config[key]):
-                if (self.valid_config_param(module_name,
-                                            cleanup=True) and
-                        not config.get(module_name)):
+            for module_name in list(config[key]):
+                if (not config.get(module_name) and
+                        self.valid_config_param(module_name, cleanup=True)):
                     config.pop(module_name)
                     if module_name in config['i3s_modules']:
                         config['i3s_modules'].remove(module_name)
@@ -451,29 +457,118 @@ class I3status(Thread):
         clean_i3status_modules('.group_extras')
         return config
 
-    def set_responses(self, json_list):
+    def add_order(self, config, name):
+        """
+        Add the module to the order of the bar.
+        """
+        config['order'].append(name)
+        # create an empty config for this module
+        if name not in config:
+            config[name] = {}
+        # detect internal modules to be loaded dynamically
+        if not self.valid_config_param(name):
+            config['py3_modules'].append(name)
+        else:
+            config['i3s_modules'].append(name)
+
+    def add_group(self, config, group):
+        """
+        Add the group and the modules it contains.
+        """
+        config[group.name] = {'items': []}
+        for item in group.items:
+            if not isinstance(item, Section):
+                continue
+            name = item.name
+            if name not in config:
+                config[name] = {}
+            config[group.name]['items'].append(name)
+            section = config['.module_groups'].setdefault(name, [])
+            if group.name not in section:
+                section.append(group.name)
+            if not self.valid_config_param(name):
+                # py3status module add a reference to the group and make sure
+                # we have it in the list of modules to run
+                if name not in config['py3_modules']:
+                    config['py3_modules'].append(name)
+            else:
+                # i3status module.  Add to the list of needed modules and add
+                # to the `.group-extras` config to ensure that it gets run
+                # even though not in `order` config
+                if name not in config['i3s_modules']:
+                    config['i3s_modules'].append(name)
+                if name not in config['.group_extras']:
+                    config['.group_extras'].append(name)
+            if name.split(' ')[0] == 'group':
+                self.add_group(config, item)
+            else:
+                self.add_section_params(config, item)
+        self.add_section_params(config, group)
+
+    def add_section_params(self, config, section):
+        """
+        Set the parameters of the section, on_click ones are stored in the
+        on_click config.
+        """
+        params = config[section.name]
+        for item in section.items:
+            if not isinstance(item, Assignment):
+                continue
+            key, value, line = item
+            if not key.startswith('on_click'):
+                params[key] = value
+                continue
+            # on_click special parameters
+            try:
+                button = int(key.split()[1])
+                if not 1 <= button <= 5:
+                    raise ValueError('should be 1, 2, 3, 4 or 5')
+            except IndexError:
+                raise ParseError('missing "button id" for "on_click" '
+                                 'parameter in section {}'.format(
+                                     section.name), line)
+            except ValueError as e:
+                raise ParseError('invalid "button id" for "on_click" '
+                                 'parameter in section {} ({})'.format(
+                                     section.name, e), line)
+            config['on_click'].setdefault(section.name, {})[button] = value
+
+    def set_responses(self, raw_items):
         """
         Set the given i3status responses on their respective configuration.
+        Only the items whose JSON changed are parsed, time items are always
+        parsed as py3status updates them.
+        Raises ValueError, leaving the modules untouched, if an item is not
+        valid JSON.
         """
-        self.update_json_list()
+        changed = []
+        # the config may have been reloaded while i3status is restarting
+        for conf_name, raw in zip(self.config['i3s_modules'], raw_items):
+            module = self.i3modules.get(conf_name)
+            if module is None:
+                module = self.i3modules[conf_name] = I3statusModule(
+                    conf_name, self.py3_wrapper)
+            if raw != module.raw or module.is_time_module:
+                changed.append((conf_name, module, raw, loads(raw)))
         updates = []
-        for index, item in enumerate(self.json_list):
-            conf_name = self.config['i3s_modules'][index]
-            if conf_name not in self.i3modules:
-                self.i3modules[conf_name] = I3statusModule(conf_name,
-                                                           self.py3_wrapper)
-            if self.i3modules[conf_name].update_from_item(item):
+        for conf_name, module, raw, item in changed:
+            if module.update_from_raw(raw, item):
                 updates.append(conf_name)
+        items = [self.i3modules[conf_name].item for conf_name, raw in
+                 zip(self.config['i3s_modules'], raw_items)]
+        self.last_output = items
+        self.update_json_list()
         self.py3_wrapper.notify_update(updates)
 
     def update_json_list(self):
         """
-        Copy the last json list output from i3status so that any module
-        can modify it without altering the original output.
+        Give a view of the last json list output from i3status to the
+        modules, its items are copied when a module reads them so that any
+        module can modify them without altering the original output.
         This is done so that any module's alteration of a i3status output json
         will not be overwritten when the next i3status output gets polled.
         """
-        self.json_list = deepcopy(self.last_output)
+        self.json_list = JsonList(self.last_output)
 
     @staticmethod
     def write_in_tmpfile(text, tmpfile):
@@ -487,28 +582,37 @@ class I3status(Thread):
 
     def write_tmp_i3status_config(self, tmpfile):
         """
-        Given a temporary file descriptor, write a valid i3status config file
-        based on the parsed one from 'i3status_config_path'.
+        Given a temporary file descriptor, write the i3status config file.
+        """
+        self.write_in_tmpfile(self.tmp_config, tmpfile)
+        tmpfile.flush()
+
+    def get_tmp_i3status_config(self, config):
+        """
+        Return a valid i3status config file based on the parsed one from
+        'i3status_config_path'.
         """
-        for section_name, conf in sorted(self.config.items()):
+        lines = []
+        for section_name, conf in sorted(config.items()):
             if section_name in ['i3s_modules', 'py3_modules', '.group_extras',
                                 '.module_groups']:
                 continue
             elif section_name == 'order':
                 for module_name in conf:
                     if self.valid_config_param(module_name):
-                        self.write_in_tmpfile('order += "%s"\n' % module_name,
-                                              tmpfile)
+                        lines.append('order += "%s"\n' % module_name)
                 # we need to make sure any additional i3status modules needed
                 # for groups are added to the i3status config
-                for module_name in self.config['.group_extras']:
-                    self.write_in_tmpfile('order += "%s"\n' % module_name,
-                                          tmpfile)
+                for module_name in config['.group_extras']:
+                    lines.append('order += "%s"\n' % module_name)
 
-                self.write_in_tmpfile('\n', tmpfile)
+                lines.append('\n')
             elif self.valid_config_param(section_name) and conf:
-                self.write_in_tmpfile('%s {\n' % section_name, tmpfile)
+                lines.append('%s {\n' % section_name)
                 for key, value in conf.items():
+                    if (section_name == 'general' and
+                            key in PY3STATUS_GENERAL_PARAMS):
+                        continue
                     # Set known fixed format for time and tztime so we can work
                     # out the timezone
                     if section_name.split()[
@@ -519,20 +623,35 @@ class I3status(Thread):
                             continue
                     if isinstance(value, bool):
                         value = '{}'.format(value).lower()
-                    self.write_in_tmpfile('    %s = "%s"\n' % (key, value),
-                                          tmpfile)
-                self.write_in_tmpfile('}\n\n', tmpfile)
-        tmpfile.flush()
+                    lines.append('    %s = "%s"\n' % (key, value))
+                lines.append('}\n\n')
+        return ''.join(lines)
+
+    def refresh_i3status(self):
+        # Ask i3status to refresh its output now
+        if self.i3status_pipe:
+            self.i3status_pipe.send_signal(SIGUSR1)
 
     def suspend_i3status(self):
         # Put i3status to sleep
         if self.i3status_pipe:
             self.i3status_pipe.send_signal(SIGSTOP)
 
-    @profile
     def run(self):
         """
-        Spawn i3status using a self generated config file and poll its output.
+        Spawn i3status using a self generated config file and poll its output,
+        i3status is spawned again when its config changed.
+        """
+        while self.lock.is_set():
+            self.restart = False
+            self.spawn_i3status()
+            if not self.restart:
+                break
+        self.i3status_pipe = None
+
+    def spawn_i3status(self):
+        """
+        Run i3status until it exits and set its output.
         """
         try:
             with NamedTemporaryFile(prefix='py3status_') as tmpfile:
@@ -548,44 +667,81 @@ class I3status(Thread):
                     # Ignore the SIGUSR2 signal for this subprocess
                     preexec_fn=lambda:  signal(SIGUSR2, SIG_IGN)
                 )
-                self.poller_inp = IOPoller(i3status_pipe.stdout)
-                self.poller_err = IOPoller(i3status_pipe.stderr)
                 self.tmpfile_path = tmpfile.name
 
                 # Store the pipe so we can signal it
                 self.i3status_pipe = i3status_pipe
 
-                try:
-                    # loop on i3status output
-                    while self.lock.is_set():
-                        line = self.poller_inp.readline()
-                        if line:
-                            # remove leading comma if present
-                            if line[0] == ',':
-                                line = line[1:]
-                            if line.startswith('[{'):
-                                json_list = loads(line)
-                                self.last_output = json_list
-                                self.set_responses(json_list)
-                                self.ready = True
-                        else:
-                            err = self.poller_err.readline()
-                            code = i3status_pipe.poll()
-                            if code is not None:
-                                msg = 'i3status died'
-                                if err:
-                                    msg += ' and said: {}'.format(err)
-                                else:
-                                    msg += ' with code {}'.format(code)
-                                raise IOError(msg)
-                except IOError:
-                    err = sys.exc_info()[1]
-                    self.error = err
+                # the output is read by the reader thread, wait for i3status
+                # to close it
+                self.last_error = None
+                closed = Event()
+                errors_closed = Event()
+                reader = self.py3_wrapper.reader
+                reader.add(i3status_pipe.stdout,
+                           partial(self.read_output, closed))
+                reader.add(i3status_pipe.stderr,
+                           partial(self.read_errors, errors_closed))
+                closed.wait()
+                errors_closed.wait()
+                if not self.lock.is_set():
+                    return
+                code = i3status_pipe.wait()
+                if self.restart:
+                    return
+
+                msg = 'i3status died'
+                if self.last_error:
+                    msg += ' and said: {}'.format(self.last_error)
+                else:
+                    msg += ' with code {}'.format(code)
+                self.error = IOError(msg)
         except OSError:
             # we cleanup the tmpfile ourselves so when the delete will occur
             # it will usually raise an OSError: No such file or directory
             pass
-        self.i3status_pipe = None
+
+    def read_output(self, closed, lines):
+        """
+        Called by the reader thread with the lines of the i3status output,
+        or None once i3status closed it.  When several outputs were read at
+        once only the last one is used.
+        The output is split in the JSON of its items, parsing it is left to
+        set_responses.
+        """
+        if lines is None:
+            closed.set()
+            return
+        # output of an i3status being restarted
+        if self.restart:
+            return
+        for line in reversed(lines):
+            # remove leading comma if present
+            if line[0] == ',':
+                line = line[1:]
+            if line.startswith('[{'):
+                raw_items = split_items(line)
+                if raw_items is not None:
+                    try:
+                        self.set_responses(raw_items)
+                    except ValueError:
+                        # the line was not split on the items boundaries
+                        raw_items = None
+                if raw_items is None:
+                    # not a flat array, get the JSON of the parsed items
+                    self.set_responses([dumps_item(x) for x in loads(line)])
+                self.ready = True
+                break
+
+    def read_errors(self, closed, lines):
+        """
+        Called by the reader thread with the lines i3status wrote on stderr,
+        or None once i3status closed it.
+        """
+        if lines is None:
+            closed.set()
+        else:
+            self.last_error = lines[-1]
 
     def cleanup_tmpfile(self):
         """
@@ -2,20 +2,34 @@ import os
 import imp
 import inspect
 
-from threading import Thread, Timer
 from collections import OrderedDict
-from syslog import syslog, LOG_INFO
+from syslog import syslog, LOG_INFO, LOG_WARNING
+from threading import Lock
 from time import time
 
 from py3status.py3 import Py3, PY3_CACHE_FOREVER
-from py3status.profiling import profile
+from py3status.startup import timed
 
+# maximum delay in seconds before running again a method that timed out
+MAX_BACKOFF = 300
+# mouse wheel buttons, their repeated clicks are merged in the click queue
+SCROLL_BUTTONS = (4, 5)
 
-class Module(Thread):
+
+def is_coroutine_function(method):
+    """
+    Check if the method is an `async def` one (python 3.5+).
+    """
+    iscoroutinefunction = getattr(inspect, 'iscoroutinefunction', None)
+    return bool(iscoroutinefunction and iscoroutinefunction(method))
+
+
+class Module:
     """
     This class represents a user module (imported file).
     It is responsible for executing it every given interval and
     caching its output based on user will.
+    Its run() method is called by the scheduler when an update is due.
     """
 
     PARAMS_NEW = 'new'
@@ -25,12 +39,23 @@ class Module(Thread):
         """
         We need quite some stuff to occupy ourselves don't we ?
         """
-        Thread.__init__(self)
+        self.async_methods = []
         self.cache_time = None
+        self.click_async = False
+        # queued clicks as [event, count, received_at]
+        self.clicks = []
+        self.click_lock = Lock()
+        self.deadline = None
+        self.execution_timeout = None
         self.click_events = False
         self.config = py3_wrapper.config
         self.has_kill = False
         self.i3status_thread = py3_wrapper.i3status_thread
+        # on_click gets a burst of scroll events at once (merge_scroll_events)
+        self.merge_scroll_events = False
+        # the module runs in its own process (execution = process)
+        self.in_process = False
+        self.scheduler = py3_wrapper.scheduler
         self.last_output = []
         self.lock = py3_wrapper.lock
         self.methods = OrderedDict()
@@ -41,68 +66,100 @@ class Module(Thread):
         self.new_update = False
         self.module_full_name = module
         self.nagged = False
+        self.running_method = None
         self.sleeping = False
-        self.timer = None
+        self.sync_methods = []
+        self.urgent = False
 
         # py3wrapper this is private and any modules accessing their instance
         # should only use it on the understanding that it is not supported.
         self._py3_wrapper = py3_wrapper
         #
         self.set_module_options(module)
+        self.set_execution_timeout(module)
         self.load_methods(module, user_modules)
 
     def __repr__(self):
         return '<Module {}>'.format(self.module_full_name)
 
+    def start(self):
+        """
+        Schedule the first run of the module.
+        """
+        if self.sync_methods:
+            self.scheduler.schedule(self)
+        self.schedule_async_methods()
+
+    def schedule_async_methods(self):
+        """
+        Schedule the async methods on the asyncio loop for when their cache
+        expires.
+        """
+        if not self.async_methods:
+            return
+        async_loop = self._py3_wrapper.get_async_loop()
+        for meth in self.async_methods:
+            cached_until = self.methods[meth]['cached_until']
+            if cached_until != PY3_CACHE_FOREVER:
+                async_loop.schedule(self, meth, cached_until)
+
     @staticmethod
-    def load_from_file(filepath):
+    def load_from_file(filepath, startup=None, name=''):
         """
         Return user-written class object from given path.
+        The import and constructor are timed by the startup profile if any.
         """
         class_inst = None
         expected_class = 'Py3status'
         module_name, file_ext = os.path.splitext(os.path.split(filepath)[-1])
         if file_ext.lower() == '.py':
-            py_mod = imp.load_source(module_name, filepath)
+            with timed(startup, 'import', name):
+                py_mod = imp.load_source(module_name, filepath)
             if hasattr(py_mod, expected_class):
-                class_inst = py_mod.Py3status()
+                with timed(startup, 'constructor', name):
+                    class_inst = py_mod.Py3status()
         return class_inst
 
     @staticmethod
-    def load_from_namespace(module_name):
+    def load_from_namespace(module_name, startup=None, name=''):
         """
         Load a py3status bundled module.
+        The import and constructor are timed by the startup profile if any.
         """
         class_inst = None
-        name = 'py3status.modules.{}'.format(module_name)
-        py_mod = __import__(name)
-        components = name.split('.')
+        namespace = 'py3status.modules.{}'.format(module_name)
+        with timed(startup, 'import', name):
+            py_mod = __import__(namespace)
+        components = namespace.split('.')
         for comp in components[1:]:
             py_mod = getattr(py_mod, comp)
-        class_inst = py_mod.Py3status()
+        with timed(startup, 'constructor', name):
+            class_inst = py_mod.Py3status()
         return class_inst
 
-    def force_update(self):
+    def force_update(self, urgent=False):
         """
         Forces an update of the module.
+        Urgent updates (eg after a click) are output without waiting for the
+        next frame of the bar.
         """
+        self.urgent = urgent
         # clear cached_until for each method to allow update
         for meth in self.methods:
             self.methods[meth]['cached_until'] = time()
             if self.config['debug']:
                 syslog(LOG_INFO, 'clearing cache for method {}'.format(meth))
-        # cancel any existing timer
-        if self.timer:
-            self.timer.cancel()
-        # get the thread to update itself
-        self.timer = Timer(0, self.run)
-        self.timer.start()
+        # get the scheduler to update us now
+        if self.sync_methods:
+            self.scheduler.schedule(self)
+        self.schedule_async_methods()
 
     def sleep(self):
         self.sleeping = True
-        # cancel any existing timer
-        if self.timer:
-            self.timer.cancel()
+        # cancel any scheduled update
+        self.scheduler.cancel(self)
+        if self.async_methods:
+            self._py3_wrapper.get_async_loop().cancel(self)
 
     def wake(self):
         self.sleeping = False
@@ -111,15 +168,15 @@ class Module(Thread):
         if cache_time == PY3_CACHE_FOREVER:
             return
         # restart
-        delay = max(cache_time - time(), 0)
-        self.timer = Timer(delay, self.run)
-        self.timer.start()
+        if self.sync_methods:
+            self.scheduler.schedule(self, cache_time)
+        self.schedule_async_methods()
 
-    def set_updated(self):
+    def set_updated(self, urgent=False):
         """
         Mark the module as updated
         """
-        self._py3_wrapper.notify_update(self.module_full_name)
+        self._py3_wrapper.notify_update(self.module_full_name, urgent=urgent)
 
     def get_latest(self):
         output = []
@@ -159,7 +216,25 @@ class Module(Thread):
 
             self.module_options['align'] = align
 
-    def _params_type(self, method_name, instance):
+    def set_execution_timeout(self, module):
+        """
+        Maximum time in seconds a method of the module can run before being
+        considered hung, set with `execution_timeout`.
+        """
+        mod_config = self.i3status_thread.config.get(module, {})
+        timeout = mod_config.get('execution_timeout')
+        if timeout is not None:
+            try:
+                timeout = float(timeout)
+            except ValueError:
+                timeout = -1
+            if timeout <= 0:
+                raise ValueError("invalid 'execution_timeout' attribute, "
+                                 "should be a positive number of seconds")
+            self.execution_timeout = timeout
+
+    @classmethod
+    def _params_type(cls, method_name, instance):
         """
         Check to see if this is a legacy method or shiny new one
 
@@ -187,9 +262,26 @@ class Module(Thread):
             arg_count = 2
         args, vargs, kw, defaults = inspect.getargspec(method)
         if len(args) == arg_count and not vargs and not kw:
-            return self.PARAMS_NEW
+            return cls.PARAMS_NEW
         else:
-            return self.PARAMS_LEGACY
+            return cls.PARAMS_LEGACY
+
+    @classmethod
+    def get_methods(cls, class_inst):
+        """
+        Return (name, params type, is async) for the methods of the module
+        instance, private and decorated methods are ignored.
+        """
+        methods = []
+        for method in sorted(dir(class_inst)):
+            if method.startswith('_'):
+                continue
+            m_type = type(getattr(class_inst, method))
+            if 'method' in str(m_type):
+                params_type = cls._params_type(method, class_inst)
+                is_async = is_coroutine_function(getattr(class_inst, method))
+                methods.append((method, params_type, is_async))
+        return methods
 
     def load_methods(self, module, user_modules):
         """
@@ -199,62 +291,94 @@ class Module(Thread):
             - decorated methods such as @property or @staticmethod
             - 'on_click' methods as they'll be called upon a click_event
             - 'kill' methods as they'll be called upon this thread's exit
+        `async def` methods are run by the asyncio loop instead of the
+        scheduler (python 3.5+).
+        Modules configured with `execution = process` are run in their own
+        process.
         """
+        mod_config = self.i3status_thread.config.get(module, {})
+        startup = self._py3_wrapper.startup
+
         # user provided modules take precedence over py3status provided modules
         if self.module_name in user_modules:
             include_path, f_name = user_modules[self.module_name]
+            module_path = (include_path, f_name)
             syslog(LOG_INFO,
                    'loading module "{}" from {}{}'.format(module, include_path,
                                                           f_name))
-            class_inst = self.load_from_file(include_path + f_name)
         # load from py3status provided modules
         else:
+            module_path = None
             syslog(LOG_INFO,
                    'loading module "{}" from py3status.modules.{}'.format(
                        module, self.module_name))
-            class_inst = self.load_from_namespace(self.module_name)
 
-        if class_inst:
-            self.module_class = class_inst
-
-            # apply module configuration from i3status config
-            mod_config = self.i3status_thread.config.get(module, {})
-            for config, value in mod_config.items():
-                # names starting with '.' are private
-                if not config.startswith('.'):
-                    setattr(self.module_class, config, value)
-
-            # Add the py3 module helper if modules self.py3 is not defined
-            if not hasattr(self.module_class, 'py3'):
-                setattr(self.module_class, 'py3', Py3(self))
-
-            # get the available methods for execution
-            for method in sorted(dir(class_inst)):
-                if method.startswith('_'):
-                    continue
+        if mod_config.get('execution') == 'process':
+            # the module instance lives in its own process, it is configured
+            # there and its async methods are run to completion there too
+            from py3status.process import ModuleProcess
+            self.in_process = True
+            with startup.timer('process start', module):
+                self.module_class = ModuleProcess(self, module_path,
+                                                  mod_config)
+            methods = [(method, params_type, False)
+                       for method, params_type, is_async
+                       in self.module_class._methods]
+        else:
+            if module_path:
+                class_inst = self.load_from_file(''.join(module_path),
+                                                 startup, module)
+            else:
+                class_inst = self.load_from_namespace(self.module_name,
+                                                      startup, module)
+            if not class_inst:
+                methods = []
+            else:
+                self.module_class = class_inst
+
+                # apply module configuration from i3status config
+                for config, value in mod_config.items():
+                    # names starting with '.' are private
+                    if not config.startswith('.'):
+                        setattr(self.module_class, config, value)
+
+                # Add the py3 module helper if modules self.py3 is not defined
+                if not hasattr(self.module_class, 'py3'):
+                    setattr(self.module_class, 'py3', Py3(self))
+
+                methods = self.get_methods(class_inst)
+                self.merge_scroll_events = getattr(
+                    class_inst, 'merge_scroll_events', False) is True
+
+        # store the available methods for execution
+        for method, params_type, is_async in methods:
+            if method == 'on_click':
+                self.click_async = is_async
+                self.click_events = params_type
+            elif method == 'kill':
+                self.has_kill = params_type
+            else:
+                # the method_obj stores infos about each method
+                # of this module.
+                method_obj = {
+                    'cached_until': time(),
+                    'call_type': params_type,
+                    'instance': None,
+                    'is_async': is_async,
+                    'last_output': {
+                        'name': method,
+                        'full_text': ''
+                    },
+                    'method': method,
+                    'name': None,
+                    'stats': self._py3_wrapper.stats.method(
+                        self.module_full_name, method),
+                }
+                self.methods[method] = method_obj
+                if is_async:
+                    self.async_methods.append(method)
                 else:
-                    m_type = type(getattr(class_inst, method))
-                    if 'method' in str(m_type):
-                        params_type = self._params_type(method, class_inst)
-                        if method == 'on_click':
-                            self.click_events = params_type
-                        elif method == 'kill':
-                            self.has_kill = params_type
-                        else:
-                            # the method_obj stores infos about each method
-                            # of this module.
-                            method_obj = {
-                                'cached_until': time(),
-                                'call_type': params_type,
-                                'instance': None,
-                                'last_output': {
-                                    'name': method,
-                                    'full_text': ''
-                                },
-                                'method': method,
-                                'name': None
-                            }
-                            self.methods[method] = method_obj
+                    self.sync_methods.append(method)
 
         # done, syslog some debug info
         if self.config['debug']:
@@ -263,25 +387,221 @@ class Module(Thread):
                        module, self.click_events, self.has_kill,
                        self.methods.keys()))
 
+    def queue_click(self, event, received_at):
+        """
+        Queue the click event, the clicks are run by the scheduler workers
+        before the methods of the module so that they never run at the same
+        time.  A scroll event repeating the last queued one is merged with
+        it, an event passed on by another module can already stand for
+        several scrolls (event['count']).
+        """
+        count = event.pop('count', 1)
+        with self.click_lock:
+            last = self.clicks[-1] if self.clicks else None
+            if (last and event.get('button') in SCROLL_BUTTONS and
+                    last[0].get('button') == event.get('button')):
+                last[0] = event
+                last[1] += count
+            else:
+                self.clicks.append([event, count, received_at])
+        self.scheduler.schedule(self)
+
+    def run_clicks(self):
+        """
+        Run the queued clicks then expire the cache of the methods so that
+        the module output reflects them.
+        Merged scroll events are given at once to the modules setting
+        merge_scroll_events = True, with their number as event['count'],
+        on_click is called once per event for the other modules.
+        """
+        with self.click_lock:
+            clicks, self.clicks = self.clicks, []
+        if not clicks:
+            return
+        stats = self._py3_wrapper.stats
+        for event, count, received_at in clicks:
+            stats.record_click(self.module_full_name, time() - received_at)
+            if self.config['debug'] and count > 1:
+                syslog(LOG_INFO, 'module "{}" merged {} clicks {}'.format(
+                    self.module_full_name, count, event))
+            if (self.merge_scroll_events and
+                    event.get('button') in SCROLL_BUTTONS):
+                event['count'] = count
+                self.click_event(event)
+            else:
+                for x in range(count):
+                    self.click_event(event)
+        self.urgent = True
+        now = time()
+        for meth in self.methods:
+            self.methods[meth]['cached_until'] = now
+        self.schedule_async_methods()
+
     def click_event(self, event):
         """
         Execute the 'on_click' method of this module with the given event.
+        An `async def` on_click is run by the asyncio loop.
         """
         try:
             click_method = getattr(self.module_class, 'on_click')
             if self.click_events == self.PARAMS_NEW:
                 # new style modules
-                click_method(event)
+                response = click_method(event)
             else:
                 # legacy modules had extra parameters passed
-                click_method(self.i3status_thread.json_list,
-                             self.i3status_thread.config['general'], event)
-            self.set_updated()
+                response = click_method(self.i3status_thread.json_list,
+                                        self.i3status_thread.config['general'],
+                                        event)
+            if self.click_async:
+                # the coroutine is run by the asyncio loop
+                self._py3_wrapper.get_async_loop().run_click(self, response)
+                return
+            self.set_updated(urgent=True)
         except Exception:
             msg = 'on_click event in `{}` failed'.format(self.module_full_name)
             self._py3_wrapper.report_exception(msg)
 
-    @profile
+    def call_method(self, meth):
+        """
+        Call the given method of the module and return its response, for
+        async methods this is a coroutine to be run by the asyncio loop.
+        """
+        method = getattr(self.module_class, meth)
+        if self.methods[meth]['call_type'] == self.PARAMS_NEW:
+            # new style modules
+            return method()
+        else:
+            # legacy modules had parameters passed
+            return method(self.i3status_thread.json_list,
+                          self.i3status_thread.config['general'])
+
+    def process_response(self, meth, response):
+        """
+        Validate and store the response of the given method and mark the
+        module as updated.  Returns the time until which it is cached.
+        """
+        my_method = self.methods[meth]
+        if isinstance(response, dict):
+            # this is a shiny new module giving a dict response
+            result = response
+        elif isinstance(response, tuple):
+            # this is an old school module reporting its position
+            position, result = response
+            if not isinstance(result, dict):
+                raise TypeError('response should be a dict')
+        else:
+            raise TypeError('response should be a dict')
+
+        # validate the response
+        if 'full_text' not in result:
+            raise KeyError('missing "full_text" key in response')
+        else:
+            result['instance'] = self.module_inst
+            result['name'] = self.module_name
+
+        # set universal module options in result
+        result.update(self.module_options)
+
+        # initialize method object
+        if my_method['name'] is None:
+            my_method['name'] = result['name']
+            if 'instance' in result:
+                my_method['instance'] = result['instance']
+            else:
+                my_method['instance'] = result['name']
+            # the clicks on this output are dispatched to us
+            self._py3_wrapper.events_thread.add_module(
+                self, my_method['name'], my_method['instance'])
+
+        # update method object cache
+        if 'cached_until' in result:
+            cached_until = result['cached_until']
+        else:
+            cached_until = time() + self.config['cache_timeout']
+        my_method['cached_until'] = cached_until
+
+        # update method object output
+        my_method['last_output'] = result
+
+        # mark module as updated
+        self.set_updated(urgent=self.urgent)
+
+        # debug info
+        if self.config['debug']:
+            syslog(LOG_INFO, 'method {} returned {} '.format(meth, result))
+        return cached_until
+
+    def method_failed(self, meth):
+        """
+        Report the exception raised by the given method.
+        This should only be called within an except: block.
+        """
+        msg = 'Instance `{}`, user method `{}` failed'
+        msg = msg.format(self.module_full_name, meth)
+        notify = not self.nagged
+        self._py3_wrapper.report_exception(msg, notify_user=notify)
+        self.nagged = True
+
+    def method_started(self, meth):
+        """
+        Arm the watchdog for the method if the module has an
+        execution_timeout.
+        """
+        if self.execution_timeout:
+            self.running_method = meth
+            self.deadline = time() + self.execution_timeout
+            self.scheduler.watch(self, meth, self.deadline)
+
+    def method_finished(self, meth):
+        """
+        Returns True if the method timed out while running.
+        """
+        my_method = self.methods[meth]
+        timed_out = my_method.pop('timed_out', False)
+        if timed_out:
+            my_method['timeouts'] = my_method.get('timeouts', 0) + 1
+        else:
+            my_method['timeouts'] = 0
+        return timed_out
+
+    def method_timed_out(self, meth):
+        """
+        Called by the watchdog when the method runs past its deadline.
+        Its last output is kept but marked as stale.
+        Returns True if the method was actually stopped (process execution
+        or async methods), else the thread running it is still busy.
+        """
+        my_method = self.methods[meth]
+        my_method['timed_out'] = True
+        stale_output = dict(my_method['last_output'])
+        general = self.i3status_thread.config['general']
+        stale_output['color'] = general['color_degraded']
+        my_method['last_output'] = stale_output
+        self.set_updated()
+
+        msg = 'Instance `{}`, user method `{}` timed out after {}s'.format(
+            self.module_full_name, meth, self.execution_timeout)
+        syslog(LOG_WARNING, msg)
+        if not self.nagged:
+            self.nagged = True
+            self._py3_wrapper.notify_user(msg + '.', level='warning')
+
+        if self.in_process:
+            self.module_class._kill()
+            return True
+        return my_method['is_async']
+
+    def backoff(self, meth):
+        """
+        Delay the next run of a method that timed out, the delay doubles on
+        every consecutive timeout.
+        """
+        my_method = self.methods[meth]
+        delay = self.execution_timeout * 2 ** my_method['timeouts']
+        cached_until = time() + min(delay, MAX_BACKOFF)
+        my_method['cached_until'] = cached_until
+        return cached_until
+
     def run(self):
         """
         On a timely fashion, execute every method found for this module.
@@ -289,93 +609,49 @@ class Module(Thread):
         didn't already do so.
         We will execute the 'kill' method of the module when we terminate.
         """
-        # cancel any existing timer
-        if self.timer:
-            self.timer.cancel()
-
         if self.lock.is_set():
+            self.run_clicks()
             cache_time = None
             # execute each method of this module
             for meth, obj in self.methods.items():
-                my_method = self.methods[meth]
-
                 # always check the lock
                 if not self.lock.is_set():
                     break
 
+                # async methods are run by the asyncio loop
+                if obj['is_async']:
+                    continue
+
                 # respect the cache set for this method
                 if time() < obj['cached_until']:
                     if not cache_time or obj['cached_until'] < cache_time:
                         cache_time = obj['cached_until']
                     continue
 
+                self.method_started(meth)
+                start = time()
                 try:
                     # execute method and get its output
-                    method = getattr(self.module_class, meth)
-                    if my_method['call_type'] == self.PARAMS_NEW:
-                        # new style modules
-                        response = method()
-                    else:
-                        # legacy modules had parameters passed
-                        response = method(
-                            self.i3status_thread.json_list,
-                            self.i3status_thread.config['general'])
-
-                    if isinstance(response, dict):
-                        # this is a shiny new module giving a dict response
-                        result = response
-                    elif isinstance(response, tuple):
-                        # this is an old school module reporting its position
-                        position, result = response
-                        if not isinstance(result, dict):
-                            raise TypeError('response should be a dict')
-                    else:
-                        raise TypeError('response should be a dict')
-
-                    # validate the response
-                    if 'full_text' not in result:
-                        raise KeyError('missing "full_text" key in response')
-                    else:
-                        result['instance'] = self.module_inst
-                        result['name'] = self.module_name
-
-                    # set universal module options in result
-                    result.update(self.module_options)
-
-                    # initialize method object
-                    if my_method['name'] is None:
-                        my_method['name'] = result['name']
-                        if 'instance' in result:
-                            my_method['instance'] = result['instance']
-                        else:
-                            my_method['instance'] = result['name']
-
-                    # update method object cache
-                    if 'cached_until' in result:
-                        cached_until = result['cached_until']
-                    else:
-                        cached_until = time() + self.config['cache_timeout']
-                    my_method['cached_until'] = cached_until
+                    response = self.call_method(meth)
+                    cached_until = self.process_response(meth, response)
+                    error = False
+                except Exception:
+                    self.method_failed(meth)
+                    cached_until = None
+                    error = True
+                self.running_method = None
+                obj['stats'].record(time() - start, error)
+                if self.method_finished(meth):
+                    # the method timed out, back off before running it again
+                    cached_until = self.backoff(meth)
+                if cached_until is not None:
                     if not cache_time or cached_until < cache_time:
                         cache_time = cached_until
 
-                    # update method object output
-                    my_method['last_output'] = result
-
-                    # mark module as updated
-                    self.set_updated()
-
-                    # debug info
-                    if self.config['debug']:
-                        syslog(LOG_INFO,
-                               'method {} returned {} '.format(meth, result))
-                except Exception:
-                    msg = 'Instance `{}`, user method `{}` failed'
-                    msg = msg.format(self.module_full_name, meth)
-                    notify = not self.nagged
-                    self._py3_wrapper.report_exception(msg, notify_user=notify)
-                    self.nagged = True
-
+            self.urgent = False
+            # modules with only async methods are not run by the scheduler
+            if cache_time is None and not self.sync_methods:
+                return
             if cache_time is None:
                 cache_time = time() + self.config['cache_timeout']
             self.cache_time = cache_time
@@ -383,16 +659,44 @@ class Module(Thread):
             if cache_time == PY3_CACHE_FOREVER:
                 return
             # don't be hasty mate
-            # set timer to do update next time one is needed
+            # schedule the update next time one is needed
             if not self.sleeping:
-                delay = max(cache_time - time(), self.config['minimum_interval'])
-                self.timer = Timer(delay, self.run)
-                self.timer.start()
+                cache_time = max(cache_time,
+                                 time() + self.config['minimum_interval'])
+                self.scheduler.schedule(self, cache_time)
+
+    def reconfigure(self, old_config):
+        """
+        Apply the module configuration of the reloaded i3status config to
+        the running module instance.  Return False if the module has to be
+        restarted instead: it runs in its own process or a parameter was
+        removed and its default value is unknown.
+        """
+        module = self.module_full_name
+        mod_config = self.i3status_thread.config.get(module, {})
+        if self.in_process or mod_config.get('execution'):
+            return False
+        if set(old_config) - set(mod_config):
+            return False
+        self.set_module_options(module)
+        self.execution_timeout = None
+        self.set_execution_timeout(module)
+        for config, value in mod_config.items():
+            # names starting with '.' are private
+            if not config.startswith('.') and old_config.get(config) != value:
+                setattr(self.module_class, config, value)
+        if self.config['debug']:
+            syslog(LOG_INFO, 'module "{}" reconfigured'.format(module))
+        self.force_update()
+        return True
 
     def kill(self):
-        # stop timer if exists
-        if self.timer:
-            self.timer.cancel()
+        # a killed module is never scheduled again
+        self.sleeping = True
+        # cancel any scheduled update
+        self.scheduler.cancel(self)
+        if self.async_methods:
+            self._py3_wrapper.get_async_loop().cancel(self)
         # check and execute the 'kill' method if present
         if self.has_kill:
             try:
@@ -406,3 +710,35 @@ class Module(Thread):
             except Exception:
                 # this would be stupid to die on exit
                 pass
+        if self.in_process:
+            self.module_class._terminate()
+
+
+class LoadingModule:
+    """
+    Placeholder of a module whose import and constructor are still running,
+    its output is shown in the bar until the module is ready.
+    """
+
+    def __init__(self, module):
+        self.module_full_name = module
+        self.output = [{
+            'full_text': '...',
+            'instance': ''.join(module.split(' ')[1:]),
+            'name': module.split(' ')[0],
+        }]
+
+    def __repr__(self):
+        return '<LoadingModule {}>'.format(self.module_full_name)
+
+    def get_latest(self):
+        return self.output
+
+    def force_update(self, urgent=False):
+        pass
+
+    def sleep(self):
+        pass
+
+    def wake(self):
+        pass
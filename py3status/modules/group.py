@@ -66,6 +66,9 @@ class Py3status:
     fixed_width = True
     format = u'{output}'
 
+    # on_click gets a burst of scroll events at once as event['count']
+    merge_scroll_events = True
+
     def __init__(self):
         self.items = []
         self.active = 0
@@ -173,12 +176,15 @@ class Py3status:
             return
         # reset cycle time
         self._cycle_time = time() + self.cycle
+        count = event.get('count', 1)
         if self.button_next and event['button'] == self.button_next:
-            self._next()
+            for x in range(count):
+                self._next()
         if self.button_prev and event['button'] == self.button_prev:
-            self._prev()
+            for x in range(count):
+                self._prev()
 
-        # pass the event to the current module
+        # pass the event to the current module, with its count
         module_name = self._get_current_module_name()
         self.py3.trigger_event(module_name, event)
 
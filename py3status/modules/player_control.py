@@ -45,6 +45,9 @@ class Py3status:
     supported_players = 'audacious,vlc'
     volume_tick = 1
 
+    # on_click gets a burst of scroll events at once as event['count']
+    merge_scroll_events = True
+
     def __init__(self):
         self.status = 'stop'
         self.icon = self.play_icon
@@ -62,7 +65,7 @@ class Py3status:
             if self.volume_tick is None:
                 return
 
-            self._change_volume(button == 'up')
+            self._change_volume(button == 'up', event.get('count', 1))
             return
 
         if self.status == 'play':
@@ -119,11 +122,11 @@ class Py3status:
             if player:
                 player.Pause()
 
-    def _change_volume(self, increase):
+    def _change_volume(self, increase, ticks=1):
         """Change volume using amixer
         """
         sign = '+' if increase else '-'
-        delta = "%d%%%s" % (self.volume_tick, sign)
+        delta = "%d%%%s" % (self.volume_tick * ticks, sign)
         self._run(('/usr/bin/amixer', '-q', 'sset', 'Master', delta))
 
     def _detect_running_player(self):
@@ -83,6 +83,9 @@ class Py3status:
     threshold_degraded = 50
     volume_delta = 5
 
+    # on_click gets a burst of scroll events at once as event['count']
+    merge_scroll_events = True
+
     # compares current volume to the thresholds, returns a color code
     def _perc_to_color(self, i3s_config, string):
         try:
@@ -165,12 +168,14 @@ class Py3status:
         '''
         button = event['button']
         cmd = 'amixer -q -D {} sset {} '.format(self.device, self.channel)
+        # a burst of scrolls changes the volume once by all its steps
+        delta = self.volume_delta * event.get('count', 1)
         # volume up
         if self.button_up and button == self.button_up:
-            call(shlex.split('{} {}%+'.format(cmd, self.volume_delta)))
+            call(shlex.split('{} {}%+'.format(cmd, delta)))
         # volume down
         elif self.button_down and button == self.button_down:
-            call(shlex.split('{} {}%-'.format(cmd, self.volume_delta)))
+            call(shlex.split('{} {}%-'.format(cmd, delta)))
         # toggle mute
         elif self.button_mute and button == self.button_mute:
             call(shlex.split('{} toggle'.format(cmd)))
@@ -86,6 +86,9 @@ class Py3status:
     format_extend = '+'
     output_combinations = None
 
+    # on_click gets a burst of scroll events at once as event['count']
+    merge_scroll_events = True
+
     def __init__(self):
         """
         """
@@ -345,10 +348,11 @@ class Py3status:
             - middle click: force refresh of available modes
         """
         button = event['button']
+        count = event.get('count', 1)
         if button == 4:
-            self._switch_selection(-1)
+            self._switch_selection(-count)
         if button in [1, 5]:
-            self._switch_selection(1)
+            self._switch_selection(count)
         if button == 2:
             self._choose_what_to_display(force_refresh=True)
         if button == 3:
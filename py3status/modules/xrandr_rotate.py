@@ -58,6 +58,9 @@ class Py3status:
     vertical_icon = 'V'
     vertical_rotation = 'left'
 
+    # on_click gets a burst of scroll events at once as event['count']
+    merge_scroll_events = True
+
     def __init__(self):
         self.displayed = ''
 
@@ -101,7 +104,8 @@ class Py3status:
         """
         button = event['button']
         if button in [1, 4, 5]:
-            self._switch_selection()
+            for x in range(event.get('count', 1)):
+                self._switch_selection()
         elif button == 3:
             self._apply()
 
@@ -0,0 +1,109 @@
+from json import dumps
+
+
+def dumps_item(item):
+    """
+    Serialize the given output item as compact JSON.
+    """
+    return dumps(item, separators=(',', ':'))
+
+
+class Output:
+    """
+    This class stores the serialized JSON fragments of every position of the
+    bar so that only the items that have changed are dumped again.
+
+    The status line is assembled using a join tree whose leaves are the
+    positions of the bar, when a position changes only its ancestors in the
+    tree are joined again.
+    """
+
+    def __init__(self, size):
+        """
+        size is the number of positions (modules) in the bar.
+        """
+        self.frames_emitted = 0
+        self.frames_suppressed = 0
+        self.last_line = None
+        self.reset(size)
+
+    def reset(self, size):
+        """
+        Clear all the positions and set their number, eg when the config
+        was reloaded.
+        """
+        leaves = 1
+        while leaves < size:
+            leaves *= 2
+        self.dirty = set()
+        self.items = [[] for x in range(size)]
+        self.leaves = leaves
+        self.size = size
+        self.tree = [''] * (2 * leaves)
+
+    def update(self, index, items, fragments=None):
+        """
+        Set the output items of the given position, only the items that
+        differ from the previous ones are serialized.
+        fragments are the JSON of the items when they are already known
+        (None for the unknown ones), they are used as is.
+        """
+        previous = self.items[index]
+        current = []
+        for i, item in enumerate(items):
+            if i < len(previous) and previous[i][0] == item:
+                current.append(previous[i])
+            elif fragments and fragments[i]:
+                current.append((dict(item), fragments[i]))
+            else:
+                current.append((dict(item), dumps_item(item)))
+        self.items[index] = current
+
+        leaf = ','.join([x[1] for x in current])
+        node = self.leaves + index
+        if self.tree[node] != leaf:
+            self.tree[node] = leaf
+            if node > 1:
+                self.dirty.add(node // 2)
+
+    def get_line(self):
+        """
+        Return the JSON items of the bar (without enclosing brackets),
+        only the parts of the join tree that changed are rebuilt.
+        """
+        tree = self.tree
+        dirty = self.dirty
+        # dirty nodes are always at the same depth of the tree
+        while dirty:
+            parents = set()
+            for node in dirty:
+                left = tree[2 * node]
+                right = tree[2 * node + 1]
+                if left and right:
+                    tree[node] = left + ',' + right
+                else:
+                    tree[node] = left or right
+                if node > 1:
+                    parents.add(node // 2)
+            dirty = parents
+        self.dirty = set()
+        return tree[1]
+
+    def get_items(self):
+        """
+        Return the output items of all the positions of the bar.
+        """
+        return [x[0] for position in self.items for x in position]
+
+    def get_frame(self):
+        """
+        Return the line to output to i3bar or None if it is identical to the
+        previous one, emitted and suppressed frames are counted.
+        """
+        line = self.get_line()
+        if line == self.last_line:
+            self.frames_suppressed += 1
+            return None
+        self.last_line = line
+        self.frames_emitted += 1
+        return line
@@ -0,0 +1,376 @@
+import re
+
+from ast import literal_eval
+from collections import namedtuple
+
+# nodes of the parsed config, values are typed (str, int or bool)
+Assignment = namedtuple('Assignment', 'key value line')
+Order = namedtuple('Order', 'value line')
+Section = namedtuple('Section', 'name items line')
+
+QUOTED = r"""(?:"[^"\\\n]*(?:\\.[^"\\\n]*)*"|'[^'\\\n]*(?:\\.[^'\\\n]*)*')"""
+# one token of a section name or of a key
+NAME_TOKEN = re.compile(r"""
+    [^\s{}="'\#+]+(?:\+(?!=)[^\s{}="'\#+]*)*    # bare word
+    | QUOTED
+""".replace('QUOTED', QUOTED), re.VERBOSE)
+# one statement of the config with the blanks and comments before it, the
+# last group matches the invalid lines
+STATEMENT = re.compile(r"""
+    (\s*(?:\#[^\n]*(?:\n\s*|\Z))*)
+    (?:
+        (\})
+        | (TOKEN(?:[ \t]+TOKEN)*)[ \t]*
+          (?:
+              (\s*\{)
+              | (\+=|=)[ \t]*
+                (?:
+                    (QUOTED)[ \t\r]*(\}?)[ \t\r]*(?:\#[^\n]*)?(?=\n|\Z)
+                    | ([^\n]*)
+                )
+          )
+        | (\Z)
+        | ([^\n]*)
+    )
+""".replace('TOKEN', '(?:{})'.format(NAME_TOKEN.pattern)).replace(
+    'QUOTED', QUOTED), re.VERBOSE)
+# a section name or a key
+NAME = re.compile(r'(?:{0})(?:[ \t]+(?:{0}))*$'.format(NAME_TOKEN.pattern),
+                  re.VERBOSE)
+INTEGER = re.compile(r'-?(?:0|[1-9][0-9]*)$')
+# characters that are not allowed in the section names and keys made of bare
+# words only, these names are read without NAME_TOKEN
+NOT_BARE = re.compile(r'[{}="\'#+\\\r\x0b\x0c]')
+
+
+class ParseError(Exception):
+    """
+    Invalid i3status config, the message holds the line of the error.
+    """
+
+    def __init__(self, msg, line):
+        Exception.__init__(self, 'line {}: {}'.format(line, msg))
+        self.line = line
+
+
+def unquote(token):
+    """
+    Return the content of a quoted string token, escape sequences are
+    interpreted as in python strings.
+    """
+    if '\\' in token:
+        return literal_eval(token)
+    return token[1:-1]
+
+
+def typed_value(text):
+    """
+    Return the typed value of an unquoted value.
+        true, false: bool (case insensitive)
+        42, -1: int
+        anything else is taken as is
+    """
+    if INTEGER.match(text):
+        return int(text)
+    if text.lower() in ('true', 'false'):
+        return text.lower() == 'true'
+    return text
+
+
+def read_name(name):
+    """
+    Normalize the tokens of a section name or key, eg disk "/home" ->
+    disk /home.
+    """
+    if '"' not in name and "'" not in name:
+        return ' '.join(name.split())
+    tokens = []
+    for token in NAME_TOKEN.findall(name):
+        if token[:1] in ('"', "'"):
+            token = unquote(token)
+        tokens.append(token)
+    return ' '.join(tokens)
+
+
+def read_key(text):
+    """
+    Return the normalized key and the operator of the text before the value
+    of an assignment, eg on_click 1 += -> ('on_click 1', '+='), or False for
+    the keys left to the STATEMENT regular expression.
+    """
+    text = text.rstrip(' \t')
+    if text[-1:] != '=':
+        return False
+    text = text[:-1]
+    operator = '='
+    if text[-1:] == '+':
+        operator = '+='
+        text = text[:-1]
+    if not text or NOT_BARE.search(text):
+        return False
+    return ' '.join(text.split()), operator
+
+
+def read_section_name(name):
+    """
+    Return the normalized name of a section opening or None if it is not
+    valid.  The common names, bare words optionally followed by one double
+    quoted string eg disk "/home", are read without NAME_TOKEN.
+    """
+    head, quote, tail = name.partition('"')
+    if not quote:
+        if name and not NOT_BARE.search(name):
+            return ' '.join(name.split())
+    elif (head[-1:] in (' ', '\t') and tail[-1:] == '"' and
+            tail.find('"') == len(tail) - 1 and '\\' not in tail and
+            not NOT_BARE.search(head)):
+        return '{} {}'.format(' '.join(head.split()), tail[:-1])
+    if NAME.match(name):
+        return read_name(name)
+    return None
+
+
+class Parser:
+    """
+    Single pass parser of the i3status config format:
+
+        # comment
+        general {
+            colors = true
+        }
+        order += "disk /home"
+        disk "/home" { format = "%free" }
+        group name {
+            cycle = 10
+            tztime local {}
+        }
+
+    The config is read line by line: the usual lines (a section opening or
+    closing, an assignment, a blank line or a comment) are tokenized with
+    string operations.  Any other statement, eg a one liner section or a
+    section whose { is on the next line, is read by one match of the
+    STATEMENT regular expression.  parse() returns the list of the top level
+    Order and Section nodes, errors are raised as ParseError with their line
+    number.
+    """
+
+    def __init__(self, text):
+        self.line = 1
+        self.text = text
+        # normalized names, keys are repeated a lot in configs
+        self.names = {}
+        self.nodes = []
+        # the open sections as (name, items, line)
+        self.stack = []
+        # items of the innermost open section
+        self.items = self.nodes
+
+    def error(self, msg):
+        raise ParseError(msg, self.line)
+
+    def read_value(self, quoted, brace, raw):
+        """
+        Return the typed value of an assignment with a flag telling if the
+        line closes the section (one liner sections).
+        """
+        if quoted is not None:
+            value = unquote(quoted)
+            # "true" and "false" are bools too
+            if len(value) in (4, 5) and value.lower() in ('true', 'false'):
+                value = value.lower() == 'true'
+            return value, bool(brace)
+        raw = raw.strip()
+        if raw[:1] in ('"', "'"):
+            self.error('invalid string {}'.format(raw))
+        closing = False
+        # a trailing unbalanced } closes the section
+        if raw.endswith('}') and raw.count('}') > raw.count('{'):
+            raw = raw[:-1].rstrip()
+            closing = True
+        return typed_value(raw), closing
+
+    def close_section(self):
+        """
+        Close the innermost open section and add it to its parent.
+        """
+        if not self.stack:
+            self.error('unexpected "}"')
+        stack = self.stack
+        section = tuple.__new__(Section, stack.pop())
+        self.items = stack[-1][1] if stack else self.nodes
+        self.items.append(section)
+
+    def statement(self, name, operator, quoted, brace, raw):
+        """
+        Add the section opening or the assignment to the tree.
+        """
+        stack = self.stack
+        names = self.names
+        if name in names:
+            name = names[name]
+        else:
+            names[name] = read_name(name)
+            name = names[name]
+        if operator == '{':
+            if stack and stack[-1][0].split(' ')[0] != 'group':
+                self.error('unexpected "{} {{" in section "{}"'.format(
+                    name, stack[-1][0]))
+            self.items = []
+            stack.append((name, self.items, self.line))
+            return
+        value, closing = self.read_value(quoted, brace, raw)
+        if not stack:
+            if operator != '+=' or name != 'order':
+                self.error('unexpected "{} {}"'.format(name, operator))
+            if closing:
+                self.error('unexpected "}"')
+            self.nodes.append(tuple.__new__(Order, (value, self.line)))
+            return
+        if operator != '=':
+            self.error('unexpected "{} {}" in section "{}"'.format(
+                name, operator, stack[-1][0]))
+        self.items.append(tuple.__new__(Assignment, (name, value, self.line)))
+        if closing:
+            self.close_section()
+
+    def match_statement(self, pos):
+        """
+        Read the statement at pos with the STATEMENT regular expression,
+        return the position following it or None at the end of the text.
+        """
+        match = STATEMENT.match(self.text, pos)
+        (blanks, close, name, opening, operator, quoted, brace, raw, end,
+         error) = match.groups()
+        if '\n' in blanks:
+            self.line += blanks.count('\n')
+        if end is not None:
+            return None
+        if error is not None:
+            self.error('unexpected "{}"'.format(error.strip()))
+        if close:
+            self.close_section()
+        elif opening:
+            self.statement(name, '{', None, None, None)
+            if '\n' in opening:
+                self.line += opening.count('\n')
+        else:
+            self.statement(name, operator, quoted, brace, raw)
+        return match.end()
+
+    def parse(self):
+        text = self.text
+        lines = enumerate(text.split('\n'), 1)
+        names = self.names
+        # key and operator of the text before the value of the assignments
+        keys = {}
+        keys_get = keys.get
+        nodes = self.nodes
+        stack = self.stack
+        items = nodes
+        new = tuple.__new__
+        # position in the text of the line pos_index, only needed by
+        # STATEMENT so it is computed when needed
+        pos = 0
+        pos_index = 0
+        for index, line in lines:
+            line = line.strip()
+            if not line or line[0] == '#':
+                continue
+            if line == '}':
+                if not stack:
+                    self.line = index
+                    self.error('unexpected "}"')
+                section = new(Section, stack.pop())
+                items = stack[-1][1] if stack else nodes
+                items.append(section)
+                continue
+            # usual statements alone on their line, the most common are the
+            # assignments of a double quoted string
+            head = None
+            parts = line.split('"')
+            if len(parts) == 3 and not parts[2] and '\\' not in parts[1]:
+                head = parts[0]
+                value = parts[1]
+                # "true" and "false" are bools too
+                if (len(value) in (4, 5) and
+                        value.lower() in ('true', 'false')):
+                    value = value.lower() == 'true'
+            elif '=' in line:
+                head, equal, value = line.partition('=')
+                head += equal
+                value = value.lstrip(' \t')
+                if value[:1] == "'":
+                    if (value.find("'", 1) != len(value) - 1 or
+                            '\\' in value):
+                        head = None
+                    else:
+                        value = value[1:-1]
+                        if (len(value) in (4, 5) and
+                                value.lower() in ('true', 'false')):
+                            value = value.lower() == 'true'
+                else:
+                    value = value.strip()
+                    # invalid strings and one liner sections
+                    if value[:1] in ('"', "'") or value.endswith('}'):
+                        head = None
+                    else:
+                        value = typed_value(value)
+            elif line[-1] == '{':
+                name = line[:-1].rstrip()
+                if name in names:
+                    name = names[name]
+                else:
+                    normalized = read_section_name(name)
+                    if normalized is not None:
+                        names[name] = normalized
+                    name = normalized
+                if name is not None:
+                    if stack and stack[-1][0].split(' ')[0] != 'group':
+                        self.line = index
+                        self.error('unexpected "{} {{" in section "{}"'.format(
+                            name, stack[-1][0]))
+                    items = []
+                    stack.append((name, items, index))
+                    continue
+            if head is not None:
+                assignment = keys_get(head)
+                if assignment is None:
+                    assignment = read_key(head)
+                    keys[head] = assignment
+                if not assignment:
+                    pass
+                elif stack and assignment[1] == '=':
+                    items.append(
+                        new(Assignment, (assignment[0], value, index)))
+                    continue
+                elif not stack and assignment == ('order', '+='):
+                    nodes.append(new(Order, (value, index)))
+                    continue
+            # read the other statements with STATEMENT until the end of a
+            # line, they can span several lines
+            while pos_index < index - 1:
+                pos = text.find('\n', pos) + 1
+                pos_index += 1
+            self.line = index
+            self.items = items
+            while pos is not None and pos < len(text) and text[pos] != '\n':
+                pos = self.match_statement(pos)
+            items = self.items
+            if pos is None or pos >= len(text):
+                break
+            # skip the lines read by STATEMENT
+            while index < self.line:
+                index, line = next(lines)
+            pos_index = self.line
+            pos += 1
+        if stack:
+            self.line = stack[-1][2]
+            self.error('section "{}" is not closed'.format(stack[-1][0]))
+        return nodes
+
+
+def parse_config(text):
+    """
+    Parse the text of an i3status config and return its nodes.
+    """
+    return Parser(text).parse()
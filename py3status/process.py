@@ -0,0 +1,241 @@
+import inspect
+import os
+import sys
+
+from multiprocessing import Pipe, Process
+from signal import (signal, SIGINT, SIGPROF, SIGTERM, SIGUSR1, SIGUSR2,
+                    SIG_DFL, SIG_IGN)
+from syslog import syslog, LOG_INFO, LOG_WARNING
+from threading import RLock
+from time import time
+from traceback import extract_tb
+
+from py3status.py3 import Py3, PY3_CACHE_FOREVER
+
+# maximum delay in seconds between two restarts of a crashed process
+MAX_RESTART_DELAY = 300
+
+
+class ModuleProcessError(Exception):
+    pass
+
+
+class ProcessPy3:
+    """
+    The self.py3 helper of modules running in a process, calls are forwarded
+    to the Py3 helper of the module in py3status.
+
+    get_module_info() is not provided as the module instances it returns
+    cannot be sent to another process.
+    """
+
+    CACHE_FOREVER = PY3_CACHE_FOREVER
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def _forward(self, name, *args):
+        self._conn.send(('py3', name, args))
+
+    def update(self, module_name=None):
+        self._forward('update', module_name)
+
+    def trigger_event(self, module_name, event):
+        self._forward('trigger_event', module_name, event)
+
+    def notify_user(self, msg, level='info'):
+        self._forward('notify_user', msg, level)
+
+
+def format_exception():
+    """
+    Describe the exception being handled with the place it happened in the
+    module, as the traceback cannot be sent to py3status.
+    """
+    exc_type, exc_obj, tb = sys.exc_info()
+    try:
+        filename, line_no = extract_tb(tb)[-1][:2]
+        return '{}: {} ({} line {})'.format(exc_type.__name__, exc_obj,
+                                            os.path.basename(filename),
+                                            line_no)
+    except IndexError:
+        return '{}: {}'.format(exc_type.__name__, exc_obj)
+    finally:
+        del tb
+
+
+def serve(conn, module_name, module_path, mod_config):
+    """
+    Entry point of the module process, load the module and run the calls
+    received from py3status until the connection is closed.
+    """
+    from py3status.module import Module
+
+    # signals are for py3status only
+    signal(SIGTERM, SIG_DFL)
+    signal(SIGINT, SIG_IGN)
+    signal(SIGUSR1, SIG_IGN)
+    signal(SIGUSR2, SIG_IGN)
+    signal(SIGPROF, SIG_IGN)
+
+    try:
+        if module_path:
+            class_inst = Module.load_from_file(''.join(module_path))
+        else:
+            class_inst = Module.load_from_namespace(module_name)
+        for config, value in mod_config.items():
+            # names starting with '.' are private
+            if not config.startswith('.'):
+                setattr(class_inst, config, value)
+        if not hasattr(class_inst, 'py3'):
+            setattr(class_inst, 'py3', ProcessPy3(conn))
+        conn.send(('methods', Module.get_methods(class_inst)))
+    except Exception:
+        conn.send(('error', format_exception()))
+        return
+
+    # python 2.7 has no coroutines
+    iscoroutine = getattr(inspect, 'iscoroutine', None)
+    loop = None
+    while True:
+        try:
+            request, name, args = conn.recv()
+        except EOFError:
+            break
+        try:
+            response = getattr(class_inst, name)(*args)
+            # async methods are run to completion in the process
+            if iscoroutine is not None and iscoroutine(response):
+                if loop is None:
+                    import asyncio
+                    loop = asyncio.new_event_loop()
+                response = loop.run_until_complete(response)
+            conn.send(('result', response))
+        except Exception:
+            conn.send(('error', format_exception()))
+
+
+class ModuleProcess:
+    """
+    This class runs a module instance in its own process so that its work
+    does not hold the GIL of py3status, it is used for modules configured
+    with `execution = process`.
+
+    It acts as the module instance: getting an attribute returns a function
+    calling the method of the same name in the process.  The process is
+    restarted with an exponential backoff if it dies.
+    """
+
+    def __init__(self, module, module_path, mod_config):
+        self._conn = None
+        # calls can come from the workers and the events thread
+        self._lock = RLock()
+        self._mod_config = mod_config
+        self._module = module
+        self._module_path = module_path
+        self._process = None
+        self._py3 = Py3(module)
+        self._restart_at = 0
+        self._restarts = 0
+        self._methods = self._start()
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def call(*args):
+            return self._call(name, args)
+        return call
+
+    def _start(self):
+        """
+        Start the process and return the methods of the module.
+        """
+        conn, child_conn = Pipe()
+        process = Process(target=serve,
+                          args=(child_conn, self._module.module_name,
+                                self._module_path, self._mod_config))
+        process.daemon = True
+        process.start()
+        child_conn.close()
+        self._conn = conn
+        self._process = process
+        syslog(LOG_INFO, 'module "{}" started in process {}'.format(
+            self._module.module_full_name, process.pid))
+        try:
+            return self._receive()
+        except Exception:
+            self._terminate()
+            raise
+
+    def _receive(self):
+        """
+        Wait for the result of the request sent to the process, forwarding
+        the module's calls to its py3 helper.
+        """
+        while True:
+            message = self._conn.recv()
+            if message[0] == 'py3':
+                name, args = message[1:]
+                getattr(self._py3, name)(*args)
+            elif message[0] == 'error':
+                syslog(LOG_WARNING, 'module "{}" process error: {}'.format(
+                    self._module.module_full_name, message[1]))
+                raise ModuleProcessError(message[1])
+            else:
+                return message[1]
+
+    def _call(self, name, args):
+        with self._lock:
+            if self._process is None:
+                if time() < self._restart_at:
+                    raise ModuleProcessError(
+                        'process restarting in {:.0f}s'.format(
+                            self._restart_at - time()))
+                try:
+                    self._start()
+                except Exception:
+                    self._crashed()
+                    raise
+            try:
+                self._conn.send(('call', name, args))
+                result = self._receive()
+            except (EOFError, IOError, OSError):
+                self._crashed()
+                raise ModuleProcessError('process died')
+            self._restarts = 0
+            return result
+
+    def _crashed(self):
+        """
+        The process died, wait before restarting it.
+        """
+        self._terminate()
+        delay = min(2 ** self._restarts, MAX_RESTART_DELAY)
+        self._restarts += 1
+        self._restart_at = time() + delay
+        syslog(LOG_WARNING, 'module "{}" process died, restarting in {}s'
+               .format(self._module.module_full_name, delay))
+        # run the module again once the process can be restarted
+        self._module.scheduler.schedule(self._module, self._restart_at)
+
+    def _kill(self):
+        """
+        Kill the process, the call waiting for it fails and the process is
+        restarted later.  This can be called from any thread.
+        """
+        process = self._process
+        if process is not None and process.is_alive():
+            process.terminate()
+
+    def _terminate(self):
+        """
+        Stop the process.
+        """
+        if self._process is None:
+            return
+        self._conn.close()
+        if self._process.is_alive():
+            self._process.terminate()
+        self._process.join(1)
+        self._process = None
@@ -1,21 +1,100 @@
-import cProfile
+import os
+import sys
 
-# Used in development
-enable_profiling = False
+from threading import Event, Thread, enumerate as enumerate_threads
+from time import time
 
+from py3status.helpers import runtime_dir
 
-def profile(thread_run_fn):
-    if not enable_profiling:
-        return thread_run_fn
+# default number of samples per second
+PROFILE_RATE = 100
+MAX_PROFILE_RATE = 1000
 
-    def wrapper_run(self):
-        """Wrap the Thread.run() method
+
+class SamplingProfiler(Thread):
+    """
+    Low overhead sampling profiler of all the py3status threads that can be
+    started and stopped while py3status runs.
+
+    The stacks of the threads are sampled at the given rate and written
+    as collapsed stacks (one `frame;frame;frame count` line per stack) that
+    flamegraph tools can read.  The root frame of each stack is a tag:
+    `module:<name>` for the workers running a module at sample time,
+    `thread:<name>` otherwise.
+    """
+
+    def __init__(self, py3_wrapper, rate=PROFILE_RATE, path=None):
+        Thread.__init__(self)
+        self.daemon = True
+        if not isinstance(rate, (int, float)) or not (
+                0 < rate <= MAX_PROFILE_RATE):
+            raise ValueError('invalid profile rate {}'.format(rate))
+        self.interval = 1.0 / rate
+        if path is None:
+            path = os.path.join(runtime_dir(), '{}.{}.collapsed'.format(
+                os.getpid(), int(time())))
+        self.path = path
+        self.py3_wrapper = py3_wrapper
+        self.sample_count = 0
+        # collapsed stack: number of samples
+        self.samples = {}
+        self.stopped = Event()
+
+    def get_tags(self):
+        """
+        Return the tag of every thread, workers are tagged with the module
+        they are running.
+        """
+        tags = {}
+        for thread in enumerate_threads():
+            # threads are grouped by class, eg all the idle workers
+            name = type(thread).__name__
+            if name == '_MainThread':
+                name = 'MainThread'
+            tags[thread.ident] = 'thread:{}'.format(name)
+        scheduler = getattr(self.py3_wrapper, 'scheduler', None)
+        if scheduler:
+            for worker in list(scheduler.workers):
+                module = worker.module
+                if module is not None:
+                    tags[worker.ident] = 'module:{}'.format(
+                        module.module_full_name)
+        return tags
+
+    def sample(self):
+        """
+        Add the current stack of every thread to the samples.
+        """
+        tags = self.get_tags()
+        samples = self.samples
+        for ident, frame in sys._current_frames().items():
+            if ident == self.ident:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append('{}:{}'.format(
+                    os.path.basename(code.co_filename), code.co_name))
+                frame = frame.f_back
+            stack.append(tags.get(ident, 'thread:{}'.format(ident)))
+            stack.reverse()
+            key = ';'.join(stack)
+            samples[key] = samples.get(key, 0) + 1
+        self.sample_count += 1
+
+    def run(self):
+        while True:
+            self.stopped.wait(self.interval)
+            if self.stopped.is_set():
+                break
+            self.sample()
+
+    def stop(self):
+        """
+        Stop sampling and write the collapsed stacks.
         """
-        profiler = cProfile.Profile()
-        try:
-            return profiler.runcall(thread_run_fn, self)
-        finally:
-            thread_id = getattr(self, 'ident', 'core')
-            profiler.dump_stats("py3status-%s.profile" % thread_id)
-
-    return wrapper_run
+        self.stopped.set()
+        self.join()
+        with open(self.path, 'w') as f:
+            for stack, count in sorted(self.samples.items()):
+                f.write('{} {}\n'.format(stack, count))
@@ -0,0 +1,164 @@
+import errno
+import fcntl
+import os
+import select
+import sys
+
+from syslog import syslog, LOG_INFO
+from threading import Lock, Thread
+
+# bytes read at once from a file descriptor
+BUFFER_SIZE = 64 * 1024
+# poll events of a file descriptor that can be read or has been closed
+READ_EVENTS = select.POLLIN | select.POLLPRI | select.POLLHUP | select.POLLERR
+
+
+def set_nonblocking(fd):
+    flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+    fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+
+
+class Stream:
+    """
+    A file descriptor read by the Reader and its incomplete last line.
+    """
+
+    def __init__(self, fd, callback):
+        self.buffer = b''
+        self.callback = callback
+        self.fd = fd
+
+    def split(self, data):
+        """
+        Return the complete lines of the data read, keeping the incomplete
+        last one for the next read.  Lines are decoded and stripped, blank
+        lines are skipped.
+        """
+        lines = (self.buffer + data).split(b'\n')
+        self.buffer = lines.pop()
+        return [line.decode('utf-8', 'replace').strip()
+                for line in lines if line.strip()]
+
+
+class Reader(Thread):
+    """
+    This class reads the lines of the i3status output and of the i3bar click
+    events in a single thread, using one poll() for all of them.
+
+    The file descriptors are left blocking as they can be shared with other
+    processes (stdin is shared with i3bar and the commands run by the
+    modules), a single read() of up to BUFFER_SIZE bytes is done when poll()
+    reports data, so a burst of events is handled in a single pass.  The
+    callback of a stream is called with the list of the complete lines read
+    and with None once the stream is closed or the reader stopped.
+    """
+
+    def __init__(self, py3_wrapper):
+        Thread.__init__(self)
+        self.daemon = True
+        self.lock = Lock()
+        # streams to add, registered by the reader thread
+        self.pending = []
+        self.poller = select.poll()
+        self.py3_wrapper = py3_wrapper
+        self.running = True
+        # fd: Stream
+        self.streams = {}
+        # pipe waking up the poll() when the streams change
+        self.wake_in, self.wake_out = os.pipe()
+        set_nonblocking(self.wake_in)
+        set_nonblocking(self.wake_out)
+        self.poller.register(self.wake_in, select.POLLIN)
+
+    def add(self, io, callback):
+        """
+        Read the lines of the file object or descriptor and call
+        callback(lines) with them.
+        """
+        fd = io if isinstance(io, int) else io.fileno()
+        with self.lock:
+            self.pending.append(Stream(fd, callback))
+        self.wake()
+
+    def stop(self):
+        self.running = False
+        self.wake()
+
+    def wake(self):
+        try:
+            os.write(self.wake_out, b'x')
+        except OSError:
+            # the pipe is full, the reader is already woken up
+            pass
+
+    def add_pending(self):
+        with self.lock:
+            pending, self.pending = self.pending, []
+        for stream in pending:
+            self.streams[stream.fd] = stream
+            self.poller.register(stream.fd, READ_EVENTS)
+
+    def call(self, stream, lines):
+        try:
+            stream.callback(lines)
+        except Exception:
+            msg = 'reader callback of fd {} failed'.format(stream.fd)
+            self.py3_wrapper.report_exception(msg, notify_user=False)
+
+    def close(self, stream):
+        """
+        Stop reading the stream, its callback is called with its last
+        incomplete line if any, then with None.
+        """
+        self.poller.unregister(stream.fd)
+        del self.streams[stream.fd]
+        if stream.buffer.strip():
+            self.call(stream,
+                      [stream.buffer.decode('utf-8', 'replace').strip()])
+        self.call(stream, None)
+
+    def read(self, stream):
+        """
+        Read the data available on the stream and call back with its
+        complete lines, this does not block as poll() reported the stream.
+        Return False if the stream was closed.
+        """
+        try:
+            data = os.read(stream.fd, BUFFER_SIZE)
+        except OSError:
+            err = sys.exc_info()[1]
+            # interrupted by a signal, read again on the next poll()
+            return err.errno in (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR)
+        if not data:
+            return False
+        lines = stream.split(data)
+        if lines:
+            self.call(stream, lines)
+        return True
+
+    def run(self):
+        while self.running:
+            self.add_pending()
+            try:
+                events = self.poller.poll()
+            except (IOError, OSError, select.error):
+                err = sys.exc_info()[1]
+                # interrupted by a signal
+                if err.args[0] == errno.EINTR:
+                    continue
+                raise
+            for fd, event in events:
+                if fd == self.wake_in:
+                    try:
+                        os.read(self.wake_in, BUFFER_SIZE)
+                    except OSError:
+                        pass
+                    continue
+                stream = self.streams.get(fd)
+                if stream and not self.read(stream):
+                    if self.py3_wrapper.config['debug']:
+                        syslog(LOG_INFO, 'fd {} closed'.format(fd))
+                    self.close(stream)
+        self.add_pending()
+        for stream in list(self.streams.values()):
+            self.close(stream)
@@ -0,0 +1,261 @@
+import heapq
+
+from itertools import count
+from syslog import syslog, LOG_INFO, LOG_WARNING
+from threading import Condition, Thread
+from time import time
+
+try:
+    # python3
+    from queue import Queue
+except ImportError:
+    # python2
+    from Queue import Queue
+
+# default number of threads running the modules, this can be set using
+# `workers` in the general section of the config
+WORKERS = 4
+
+
+class Worker(Thread):
+    """
+    A thread of the pool running the modules dispatched by the scheduler.
+    """
+
+    def __init__(self, scheduler):
+        Thread.__init__(self)
+        self.daemon = True
+        self.module = None
+        # a retired worker is stuck in a hung module and has been replaced,
+        # it exits once the module returns
+        self.retired = False
+        self.scheduler = scheduler
+
+    def run(self):
+        scheduler = self.scheduler
+        while True:
+            item = scheduler.queue.get()
+            if item is None:
+                break
+            module, queued_at = item
+            scheduler.set_queue_wait(module, time() - queued_at)
+            self.module = module
+            try:
+                module.run()
+            except Exception:
+                msg = 'Module `{}` failed'.format(module)
+                scheduler.py3_wrapper.report_exception(msg, notify_user=False)
+            finally:
+                self.module = None
+                scheduler.done(module)
+            if self.retired:
+                break
+
+
+class Scheduler(Thread):
+    """
+    This class is responsible for running the modules when they need to be
+    updated.
+
+    A single thread keeps a heap of the next run time of every module and
+    hands the modules that are due to a bounded pool of worker threads.
+    A module is never run by two workers at the same time.
+
+    The workers queue is fair: modules are queued in the order they became
+    due, a module is queued at most once and modules due together are
+    queued least recently run first.
+
+    The scheduler is also the watchdog of the modules having an
+    execution_timeout, a worker stuck in a timed out method is replaced so
+    the pool keeps its size.
+    """
+
+    def __init__(self, py3_wrapper):
+        Thread.__init__(self)
+        self.daemon = True
+        self.condition = Condition()
+        self.config = py3_wrapper.config
+        self.counter = count()
+        # watchdog heap of (deadline, id, module, method)
+        self.deadlines = []
+        self.heap = []
+        # module: time of its last dispatch to the workers
+        self.last_run = {}
+        self.lock = py3_wrapper.lock
+        # modules that became due while they were running
+        self.pending = set()
+        self.py3_wrapper = py3_wrapper
+        self.queue = Queue()
+        self.running = set()
+        # module: (last, max) time spent waiting for a worker
+        self.queue_wait = {}
+        # module: (time, id) of its next run, other heap entries are stale
+        self.scheduled = {}
+        workers = self.get_workers_count()
+        self.workers = [Worker(self) for x in range(workers)]
+
+    def get_workers_count(self):
+        """
+        Number of workers set by `workers` in the general section.
+        """
+        general = self.py3_wrapper.i3status_thread.config['general']
+        workers = general.get('workers', WORKERS)
+        if not isinstance(workers, int) or workers < 1:
+            msg = 'Invalid workers setting ({}), using {}.'
+            self.py3_wrapper.notify_user(msg.format(workers, WORKERS),
+                                         level='warning')
+            workers = WORKERS
+        return workers
+
+    def schedule(self, module, when=None):
+        """
+        Schedule the module to run at the given time (now by default).
+        If the module is already scheduled earlier we keep that run.
+        """
+        if when is None:
+            when = time()
+        with self.condition:
+            current = self.scheduled.get(module)
+            if current and current[0] <= when:
+                return
+            entry = (when, next(self.counter))
+            self.scheduled[module] = entry
+            heapq.heappush(self.heap, entry + (module, ))
+            # wake up the scheduler if this is now the next module to run
+            if self.heap[0][2] is module:
+                self.condition.notify()
+
+    def watch(self, module, method, deadline):
+        """
+        Check that the running method of the module returns before the
+        deadline.
+        """
+        with self.condition:
+            entry = (deadline, next(self.counter), module, method)
+            heapq.heappush(self.deadlines, entry)
+            if self.deadlines[0] is entry:
+                self.condition.notify()
+
+    def check_deadlines(self):
+        """
+        Handle the methods that have run past their deadline and return the
+        time until the next deadline.
+        Must be called with the condition held.
+        """
+        deadlines = self.deadlines
+        while deadlines:
+            deadline, entry_id, module, method = deadlines[0]
+            # skip methods that returned in time
+            if (module.running_method != method or
+                    module.deadline != deadline):
+                heapq.heappop(deadlines)
+                continue
+            timeout = deadline - time()
+            if timeout > 0:
+                return timeout
+            heapq.heappop(deadlines)
+            if not module.method_timed_out(method):
+                self.replace_worker(module)
+        return None
+
+    def replace_worker(self, module):
+        """
+        Retire the worker stuck running the module and start a new one.
+        Must be called with the condition held.
+        """
+        for worker in self.workers:
+            if worker.module is module:
+                worker.retired = True
+                self.workers.remove(worker)
+                worker = Worker(self)
+                self.workers.append(worker)
+                worker.start()
+                break
+
+    def cancel(self, module):
+        """
+        Remove any scheduled run of the module.
+        """
+        with self.condition:
+            self.scheduled.pop(module, None)
+            self.pending.discard(module)
+
+    def dispatch(self, module):
+        """
+        Hand the module to the workers unless it is already running in which
+        case it will be run again once finished.
+        Must be called with the condition held.
+        """
+        if module in self.running:
+            self.pending.add(module)
+        else:
+            now = time()
+            self.last_run[module] = now
+            self.running.add(module)
+            self.queue.put((module, now))
+
+    def done(self, module):
+        """
+        Called by the workers when a module has finished running.
+        """
+        with self.condition:
+            self.running.discard(module)
+            if module in self.pending:
+                self.pending.discard(module)
+                self.dispatch(module)
+
+    def set_queue_wait(self, module, wait):
+        """
+        Record the time the module waited in the queue for a worker.
+        """
+        max_wait = self.queue_wait.get(module, (0, 0))[1]
+        self.queue_wait[module] = (wait, max(wait, max_wait))
+        if self.config['debug']:
+            syslog(LOG_INFO, 'module {} waited {:.3f}s for a worker'.format(
+                module.module_full_name, wait))
+        elif wait > 1:
+            syslog(LOG_WARNING, 'module {} waited {:.3f}s for a worker, '
+                   'consider raising workers'.format(module.module_full_name,
+                                                     wait))
+
+    def stop(self):
+        """
+        Stop the scheduler and its workers.
+        """
+        with self.condition:
+            self.condition.notify()
+        for worker in self.workers:
+            self.queue.put(None)
+
+    def run(self):
+        for worker in self.workers:
+            worker.start()
+
+        heap = self.heap
+        while self.lock.is_set():
+            with self.condition:
+                timeout = None
+                due = []
+                while heap:
+                    when, entry_id, module = heap[0]
+                    # skip cancelled or rescheduled entries
+                    if self.scheduled.get(module) != (when, entry_id):
+                        heapq.heappop(heap)
+                        continue
+                    timeout = when - time()
+                    if timeout > 0:
+                        break
+                    heapq.heappop(heap)
+                    del self.scheduled[module]
+                    due.append(module)
+                    timeout = None
+                # least recently run modules first
+                due.sort(key=lambda m: self.last_run.get(m, 0))
+                for module in due:
+                    self.dispatch(module)
+                deadline = self.check_deadlines()
+                if deadline is not None:
+                    if timeout is None or deadline < timeout:
+                        timeout = deadline
+                if self.lock.is_set():
+                    self.condition.wait(timeout)
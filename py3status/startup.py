@@ -0,0 +1,115 @@
+from __future__ import print_function
+
+import sys
+
+from contextlib import contextmanager
+from time import time
+
+# seconds to wait for all the modules to be ready before reporting
+STARTUP_TIMEOUT = 30
+
+
+class StartupProfile:
+    """
+    This class records the time spent in the phases of the py3status
+    startup: configuration parsing, import and constructor of each module,
+    first call of each method and time to the first frame.
+
+    It is reported by `py3status --profile-startup`.
+    """
+
+    def __init__(self):
+        self.first_frame = None
+        self.ready = None
+        self.start = time()
+        # (phase, name, duration)
+        self.timings = []
+
+    def record(self, phase, name, duration):
+        self.timings.append((phase, name, duration))
+
+    @contextmanager
+    def timer(self, phase, name=''):
+        """
+        Record the time spent in the with block.
+        """
+        start = time()
+        try:
+            yield
+        finally:
+            self.record(phase, name, time() - start)
+
+    def set_first_frame(self):
+        if self.first_frame is None:
+            self.first_frame = time() - self.start
+
+    def check_ready(self, stats):
+        """
+        Return True once all the methods of the modules have been called
+        at least once and the first frame has been printed.
+        """
+        if self.first_frame is None:
+            return False
+        for method_stats in list(stats.methods.values()):
+            if method_stats.first is None:
+                return False
+        self.ready = time() - self.start
+        return True
+
+    def dump(self, stats):
+        timings = list(self.timings)
+        pending = []
+        for (module_name, method), method_stats in stats.methods.items():
+            name = '{}.{}'.format(module_name, method)
+            if method_stats.first is None:
+                pending.append(name)
+            else:
+                timings.append(('first call', name, method_stats.first))
+        timings.sort(key=lambda x: x[2], reverse=True)
+        return {
+            'first_frame': self.first_frame,
+            'pending': sorted(pending),
+            'ready': self.ready,
+            'timings': [{'duration': duration, 'name': name, 'phase': phase}
+                        for phase, name, duration in timings],
+        }
+
+    def report(self, stats, output_format='table'):
+        """
+        Print the report to stdout as a table (slowest first) or as JSON.
+        """
+        data = self.dump(stats)
+        if output_format == 'json':
+            from json import dumps
+            print(dumps(data, sort_keys=True), file=sys.__stdout__)
+            return
+
+        def ms(value):
+            if value is None:
+                return '-'
+            return '{:.1f}'.format(value * 1000)
+
+        lines = []
+        line = '{:<16} {:<40} {:>10}'
+        lines.append(line.format('PHASE', 'NAME', 'TIME ms'))
+        for timing in data['timings']:
+            lines.append(line.format(timing['phase'], timing['name'][:40],
+                                     ms(timing['duration'])))
+        lines.append('')
+        lines.append(line.format('first frame', '', ms(data['first_frame'])))
+        lines.append(line.format('all ready', '', ms(data['ready'])))
+        for name in data['pending']:
+            lines.append(line.format('not ready', name[:40], '-'))
+        print('\n'.join(lines), file=sys.__stdout__)
+
+
+@contextmanager
+def timed(startup, phase, name=''):
+    """
+    Time the with block using the StartupProfile if there is one.
+    """
+    if startup is None:
+        yield
+    else:
+        with startup.timer(phase, name):
+            yield
@@ -0,0 +1,231 @@
+from __future__ import print_function
+
+import os
+import sys
+
+from math import log
+from time import sleep, time
+
+from py3status.control import send_command
+from py3status.helpers import print_stderr
+
+# histogram buckets go from 0.1ms up, each one 25% wider than the previous
+BUCKET_BASE = 0.0001
+BUCKET_RATIO = 1.25
+BUCKETS = 72
+
+# refresh interval in seconds of `py3status top`
+STATS_INTERVAL = 2
+
+
+class Histogram:
+    """
+    Low overhead histogram of durations in seconds using log-scale buckets,
+    percentiles are approximated by the upper bound of their bucket.
+    """
+
+    def __init__(self):
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.max = 0
+        self.total = 0
+
+    def add(self, value):
+        if value > BUCKET_BASE:
+            index = int(log(value / BUCKET_BASE) / log(BUCKET_RATIO)) + 1
+            index = min(index, BUCKETS - 1)
+        else:
+            index = 0
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, percent):
+        if not self.count:
+            return 0
+        rank = self.count * percent / 100.0
+        seen = 0
+        for index, bucket in enumerate(self.buckets):
+            seen += bucket
+            if seen >= rank:
+                return min(BUCKET_BASE * BUCKET_RATIO ** index, self.max)
+        return self.max
+
+    def dump(self):
+        return {
+            'count': self.count,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'total': self.total,
+        }
+
+
+class MethodStats:
+    """
+    Counters of the calls of a module method.
+    """
+
+    def __init__(self, stats):
+        self.errors = 0
+        # duration of the first call
+        self.first = None
+        self.histogram = Histogram()
+        self.stats = stats
+
+    def record(self, duration, error=False):
+        if self.first is None:
+            self.first = duration
+        self.histogram.add(duration)
+        if error:
+            self.errors += 1
+
+    def dump(self):
+        data = self.histogram.dump()
+        data['errors'] = self.errors
+        return data
+
+
+class Stats:
+    """
+    This class holds the always on statistics of the modules:
+        - execution time and errors of each method
+        - time between a module output change and its print to i3bar
+        - time between the read of a click event and its on_click call
+
+    They are served by the `stats` command of the control socket that
+    `py3status top` uses.
+    """
+
+    def __init__(self, py3_wrapper):
+        self.click_latency = {}
+        self.methods = {}
+        self.output_latency = {}
+        self.py3_wrapper = py3_wrapper
+
+    def method(self, module_name, method):
+        """
+        Return the MethodStats of the method of the module.
+        """
+        key = (module_name, method)
+        stats = self.methods.get(key)
+        if stats is None:
+            stats = self.methods[key] = MethodStats(self)
+        return stats
+
+    def remove(self, module_name):
+        """
+        Forget the stats of a module that was stopped.
+        """
+        for key in list(self.methods):
+            if key[0] == module_name:
+                del self.methods[key]
+        self.output_latency.pop(module_name, None)
+        self.click_latency.pop(module_name, None)
+
+    def record_output(self, module_name, latency):
+        """
+        Record the time between the output change of the module and its
+        print.
+        """
+        histogram = self.output_latency.get(module_name)
+        if histogram is None:
+            histogram = self.output_latency[module_name] = Histogram()
+        histogram.add(latency)
+
+    def record_click(self, module_name, latency):
+        """
+        Record the time between the read of a click event on stdin and the
+        call of the on_click of the module.
+        """
+        histogram = self.click_latency.get(module_name)
+        if histogram is None:
+            histogram = self.click_latency[module_name] = Histogram()
+        histogram.add(latency)
+
+    def dump(self):
+        modules = {}
+        for (module_name, method), stats in list(self.methods.items()):
+            module = modules.setdefault(module_name, {'methods': {}})
+            module['methods'][method] = stats.dump()
+        for module_name, histogram in list(self.output_latency.items()):
+            module = modules.setdefault(module_name, {'methods': {}})
+            module['output_latency'] = histogram.dump()
+        for module_name, histogram in list(self.click_latency.items()):
+            module = modules.setdefault(module_name, {'methods': {}})
+            module['click_latency'] = histogram.dump()
+
+        output = self.py3_wrapper.output
+        scheduler = self.py3_wrapper.scheduler
+        for module, (last, max_wait) in list(scheduler.queue_wait.items()):
+            module = modules.setdefault(module.module_full_name,
+                                        {'methods': {}})
+            module['queue_wait'] = {'last': last, 'max': max_wait}
+        return {
+            'frames_emitted': output.frames_emitted if output else 0,
+            'frames_suppressed': output.frames_suppressed if output else 0,
+            'modules': modules,
+            'pid': os.getpid(),
+            'time': time(),
+        }
+
+
+def format_top(data):
+    """
+    Format the stats of a py3status instance as a table, the most expensive
+    methods first.
+    """
+    rows = []
+    for module_name, module in data['modules'].items():
+        output_p95 = module.get('output_latency', {}).get('p95', 0)
+        wait_max = module.get('queue_wait', {}).get('max', 0)
+        click_p95 = module.get('click_latency', {}).get('p95', 0)
+        for method, stats in module['methods'].items():
+            rows.append((stats['total'], module_name, method, stats['count'],
+                         stats['errors'], stats['p50'] * 1000,
+                         stats['p95'] * 1000, stats['max'] * 1000,
+                         wait_max * 1000, output_p95 * 1000,
+                         click_p95 * 1000))
+    rows.sort(reverse=True)
+
+    lines = ['py3status pid {}  frames emitted {}  suppressed {}'.format(
+        data['pid'], data['frames_emitted'], data['frames_suppressed']), '']
+    line = ('{:<24} {:<16} {:>7} {:>6} {:>9} {:>9} {:>9} {:>9} {:>9} {:>9} '
+            '{:>9}')
+    lines.append(line.format('MODULE', 'METHOD', 'CALLS', 'ERRORS',
+                             'P50 ms', 'P95 ms', 'MAX ms', 'TOTAL s',
+                             'WAIT ms', 'PRINT ms', 'CLICK ms'))
+    for row in rows:
+        total, module_name, method, calls, errors, p50, p95, max_time, \
+            wait_max, output_p95, click_p95 = row
+        lines.append(line.format(module_name[:24], method[:16], calls, errors,
+                                 '{:.1f}'.format(p50), '{:.1f}'.format(p95),
+                                 '{:.1f}'.format(max_time),
+                                 '{:.2f}'.format(total),
+                                 '{:.1f}'.format(wait_max),
+                                 '{:.1f}'.format(output_p95),
+                                 '{:.1f}'.format(click_p95)))
+    return '\n'.join(lines)
+
+
+def top(refresh=STATS_INTERVAL):
+    """
+    Live view of the stats of the running py3status instances.
+    """
+    try:
+        while True:
+            results = [response['result']
+                       for pid, response in send_command({'command': 'stats'})
+                       if response.get('ok')]
+            if not results:
+                print_stderr('Error: no running py3status found')
+                sys.exit(1)
+            # clear the terminal
+            sys.stdout.write('\033[2J\033[H')
+            print('\n\n'.join([format_top(data) for data in results]))
+            sys.stdout.flush()
+            sleep(refresh)
+    except KeyboardInterrupt:
+        pass
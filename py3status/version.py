@@ -0,0 +1 @@
+version = '2.9'
@@ -0,0 +1,224 @@
+import os
+import select
+import struct
+import sys
+
+from syslog import syslog, LOG_INFO, LOG_WARNING
+from threading import Lock, Thread
+from time import sleep, time
+
+# inotify events of a directory telling that a file changed, see inotify(7)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_DELETE = 0x00000200
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE
+# struct inotify_event header: wd, mask, cookie, len
+EVENT_HEADER = struct.Struct('iIII')
+
+# seconds without new change before calling back, editors often write a
+# file in several steps
+DEBOUNCE = 0.25
+# seconds between two checks of the files when inotify is not available
+POLL_INTERVAL = 1
+
+
+class Inotify:
+    """
+    Minimal ctypes binding of the linux inotify API watching directories.
+    """
+
+    def __init__(self):
+        import ctypes
+        import ctypes.util
+        libc_name = ctypes.util.find_library('c') or 'libc.so.6'
+        self.libc = ctypes.CDLL(libc_name, use_errno=True)
+        self.get_errno = ctypes.get_errno
+        fd = self.libc.inotify_init1(IN_CLOEXEC)
+        if fd < 0:
+            raise OSError(self.get_errno(), 'inotify_init1 failed')
+        self.fd = fd
+        # watch descriptor: directory
+        self.watches = {}
+
+    def add_watch(self, directory):
+        path = directory
+        if not isinstance(path, bytes):
+            path = path.encode(sys.getfilesystemencoding())
+        wd = self.libc.inotify_add_watch(self.fd, path, WATCH_MASK)
+        if wd < 0:
+            raise OSError(self.get_errno(), 'inotify_add_watch failed',
+                          directory)
+        self.watches[wd] = directory
+
+    def read(self, timeout):
+        """
+        Return the paths of the files changed, waiting at most timeout
+        seconds (forever if None) for a change.
+        """
+        if not select.select([self.fd], [], [], timeout)[0]:
+            return []
+        data = os.read(self.fd, 64 * 1024)
+        paths = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            directory = self.watches.get(wd)
+            if directory is None or not name:
+                continue
+            if not isinstance(directory, bytes):
+                name = name.decode(sys.getfilesystemencoding())
+            paths.append(os.path.join(directory, name))
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+class Watcher(Thread):
+    """
+    This class watches files and directories and calls back when their
+    files change, it uses inotify on linux and polls the files otherwise.
+
+    The changes are debounced: a callback is called once the files have not
+    changed for DEBOUNCE seconds with the set of the paths changed.
+    """
+
+    def __init__(self, py3_wrapper):
+        Thread.__init__(self)
+        self.daemon = True
+        # watched path: callbacks
+        self.callbacks = {}
+        try:
+            self.inotify = Inotify()
+        except (AttributeError, OSError):
+            err = sys.exc_info()[1]
+            syslog(LOG_INFO, 'inotify not available ({}), polling files '
+                   'every {}s'.format(err, POLL_INTERVAL))
+            self.inotify = None
+        self.lock = py3_wrapper.lock
+        # changed path: time of its last change
+        self.pending = {}
+        self.py3_wrapper = py3_wrapper
+        # path: (mtime, size) of the polled files
+        self.snapshot = {}
+        self.watch_lock = Lock()
+
+    def watch(self, path, callback):
+        """
+        Call callback(paths) when the file or the files of the directory
+        change.
+        """
+        path = os.path.abspath(path)
+        with self.watch_lock:
+            if path in self.callbacks:
+                self.callbacks[path].append(callback)
+                return
+            self.callbacks[path] = [callback]
+            if self.inotify:
+                self.add_watch(path)
+            else:
+                self.snapshot.update(self.stat_files(path))
+
+    def add_watch(self, path):
+        """
+        Files are watched through their directory so that files replaced
+        by editors (written then renamed) are still watched.
+        """
+        if not os.path.isdir(path):
+            path = os.path.dirname(path)
+        if path in self.inotify.watches.values():
+            return
+        try:
+            self.inotify.add_watch(path)
+        except OSError:
+            err = sys.exc_info()[1]
+            syslog(LOG_WARNING, 'cannot watch {} ({})'.format(path, err))
+
+    def stat_files(self, path):
+        """
+        Return the (mtime, size) of the file or of the files of the
+        directory.
+        """
+        if os.path.isdir(path):
+            paths = [os.path.join(path, name) for name in os.listdir(path)]
+        else:
+            paths = [path]
+        files = {}
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files[path] = (stat.st_mtime, stat.st_size)
+        return files
+
+    def poll(self, timeout):
+        """
+        Return the paths of the files changed since the last poll.
+        """
+        sleep(timeout)
+        with self.watch_lock:
+            snapshot = {}
+            for path in self.callbacks:
+                snapshot.update(self.stat_files(path))
+            changed = [path for path in set(snapshot) | set(self.snapshot)
+                       if snapshot.get(path) != self.snapshot.get(path)]
+            self.snapshot = snapshot
+        return changed
+
+    def get_callbacks(self, path):
+        """
+        Return the callbacks watching the path, either directly or through
+        its directory.
+        """
+        with self.watch_lock:
+            return (self.callbacks.get(path, []) +
+                    self.callbacks.get(os.path.dirname(path), []))
+
+    def dispatch(self, paths):
+        """
+        Call back with the paths they watch.
+        """
+        calls = {}
+        for path in paths:
+            for callback in self.get_callbacks(path):
+                calls.setdefault(callback, set()).add(path)
+        for callback, paths in calls.items():
+            try:
+                callback(paths)
+            except Exception:
+                msg = 'watcher callback for {} failed'.format(
+                    ', '.join(sorted(paths)))
+                self.py3_wrapper.report_exception(msg, notify_user=False)
+
+    def run(self):
+        if self.inotify:
+            read = self.inotify.read
+        else:
+            read = self.poll
+
+        while self.lock.is_set():
+            if self.pending:
+                timeout = DEBOUNCE
+            elif self.inotify:
+                # wait for a change, the thread is a daemon so it does not
+                # have to wake up to stop
+                timeout = None
+            else:
+                timeout = POLL_INTERVAL
+            changed = read(timeout)
+            now = time()
+            for path in changed:
+                self.pending[path] = now
+            # call back once the changes have settled
+            if self.pending and now - max(self.pending.values()) >= DEBOUNCE:
+                paths = list(self.pending)
+                self.pending = {}
+                self.dispatch(paths)
+        if self.inotify:
+            self.inotify.close()
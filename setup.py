@@ -13,9 +13,17 @@ from setuptools import find_packages, setup
 def read(fname):
     return open(os.path.join(os.path.dirname(__file__), fname)).read()
 
+
+# The version is kept in py3status/version.py so that py3status does not
+# need pkg_resources to know it, read it without importing the package.
+def get_version():
+    for line in read('py3status/version.py').splitlines():
+        if line.startswith('version = '):
+            return line.split('=')[1].strip().strip("'")
+
 setup(
     name='py3status',
-    version='2.9',
+    version=get_version(),
     author='Ultrabug',
     author_email='ultrabug@ultrabug.net',
     description='py3status is an extensible i3status wrapper written in python',